@@ -1,4 +1,8 @@
 import streamlit as st
+import pandas as pd
+
+# Cached frames are shared between sessions, frames derived from them must not write through
+pd.options.mode.copy_on_write = True
 
 st.logo('./img/Logo.png', icon_image='./img/Logo.png')
 st.set_page_config(page_title="Stats Tool", layout='wide')
@@ -7,6 +11,7 @@ home_page = st.Page('views/home.py', icon=":material/home:", title='Home', defau
 tournament_page = st.Page('views/tournament.py', icon=":material/trophy:", title='Tournaments')
 leaderboard_page = st.Page('views/leaderboard.py', icon=":material/leaderboard:", title='Leaderboard')
 team_page = st.Page('views/team.py', icon=":material/group:", title='Teams')
+matchups_page = st.Page('views/matchups.py', icon=":material/swords:", title='Head-to-head')
 player_page = st.Page('views/player.py', icon=":material/person:", title='Players')
 map_page = st.Page('views/map.py', icon=":material/public:", title='Maps')
 mech_page = st.Page('views/mech.py', icon=":material/robot:", title='Mechs')
@@ -22,11 +27,13 @@ renaming_page = st.Page('views/renaming.py', title=' ')
 new_mechs_page = st.Page('views/new_mechs.py', title=' ')
 compare_tool_page = st.Page('views/compare_tool.py', title=' ')
 calculate_elo_page = st.Page('views/calculate_elo.py', title=' ')
+tournament_odds_page = st.Page('views/tournament_odds.py', title=' ')
+rating_report_page = st.Page('views/rating_report.py', title=' ')
 
 navigation = st.navigation({
-    "Statistics": [home_page, tournament_page, leaderboard_page, team_page, player_page, map_page, mech_page, elo_page],
+    "Statistics": [home_page, tournament_page, leaderboard_page, team_page, matchups_page, player_page, map_page, mech_page, elo_page],
     "Data": [download_page, match_details_page],
-    "Settings": [settings_page, admin_page, upload_page, renaming_page, new_mechs_page, compare_tool_page, calculate_elo_page]
+    "Settings": [settings_page, admin_page, upload_page, renaming_page, new_mechs_page, compare_tool_page, calculate_elo_page, tournament_odds_page, rating_report_page]
 })
 
 navigation.run()
@@ -0,0 +1,85 @@
+import json
+import sqlite3 as sql
+import unittest
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import path
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from utility.jarls import Jarls_Client
+
+class Stand_In_Handler(BaseHTTPRequestHandler):
+    """Jarl's list stand-in, pilots named `ghost...` are unknown."""
+    hits = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        pilot = self.path.split('/')[3]
+        if pilot.startswith('ghost'):
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = json.dumps({'PilotName': pilot, 'Rank': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class Jarls_Client_Test(unittest.TestCase):
+    def setUp(self):
+        Stand_In_Handler.hits = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Stand_In_Handler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.directory = TemporaryDirectory()
+        self.cache_file = path.join(self.directory.name, 'jarls.sqlite3')
+        self.client = Jarls_Client(self.cache_file, base_url=f'http://127.0.0.1:{self.server.server_port}', ttl=60, not_found_ttl=30, workers=2)
+
+    def tearDown(self):
+        self.client.executor.shutdown()
+        self.client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def age_cache(self, seconds):
+        with sql.connect(self.cache_file) as conn:
+            conn.execute('UPDATE JarlsCache SET FetchedAt = FetchedAt - ?', (seconds,))
+
+    def test_not_found_is_cached(self):
+        first = self.client.pilot_stats('ghost1')
+        second = self.client.pilot_stats('ghost1')
+
+        self.assertEqual(first, ({}, "Pilot ghost1 was not found on Jarl's list."))
+        self.assertEqual(second, first)
+        self.assertEqual(len(Stand_In_Handler.hits), 1)
+
+    def test_expired_entries_are_fetched_again(self):
+        self.client.pilot_stats('pilot1')
+        self.client.pilot_stats('ghost1')
+
+        # Past the not found lifetime only
+        self.age_cache(45)
+        self.assertEqual(self.client.pilot_stats('pilot1'), ({'PilotName': 'pilot1', 'Rank': 1}, None))
+        self.client.pilot_stats('ghost1')
+        self.assertEqual(len(Stand_In_Handler.hits), 3)
+
+        self.age_cache(120)
+        self.client.pilot_stats('pilot1')
+        self.assertEqual(len(Stand_In_Handler.hits), 4)
+
+    def test_stream_serves_cached_pilots_first(self):
+        self.client.pilot_stats('pilot1')
+        results = list(self.client.stream(['pilot2', 'pilot1', 'ghost1', 'pilot2']))
+
+        self.assertEqual(results[0], ('pilot1', {'PilotName': 'pilot1', 'Rank': 1}, None))
+        self.assertEqual(sorted(pilot for pilot, _, _ in results), ['ghost1', 'pilot1', 'pilot2'])
+        self.assertEqual(len(Stand_In_Handler.hits), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import numpy as np
+
+class Chassis_Baseline:
+    def __init__(self, indicators, threshold=10, floor=0.75, ceiling=1.25):
+        """
+        Initializes running per-chassis averages used to normalize pilot performance.
+
+        Stats are kept in (division x chassis x indicator) arrays of sums with a matching array of counts,
+        so every update is O(1). Division slot 0 is the general baseline for all divisions.
+
+        Args:
+            indicators (list): Names of the performance indicators.
+            threshold (int): Uses required before a chassis baseline is trusted.
+            floor (float): Lowest normalized value of a single indicator.
+            ceiling (float): Highest normalized value of a single indicator.
+        """
+        self.indicators = list(indicators)
+        self.threshold = threshold
+        self.floor = floor
+        self.ceiling = ceiling
+
+        self.divisions = {None: 0}
+        self.chassis = {}
+        self.counts = np.zeros((1, 0), dtype=np.int64)
+        self.sums = np.zeros((1, 0, len(self.indicators)), dtype=np.float64)
+
+    def _codes(self, labels, mapping):
+        codes = np.empty(len(labels), dtype=np.intp)
+        for position, label in enumerate(labels):
+            if label not in mapping:
+                mapping[label] = len(mapping)
+            codes[position] = mapping[label]
+
+        return codes
+
+    def _resize(self):
+        divisions = len(self.divisions)
+        chassis = len(self.chassis)
+        current_divisions, current_chassis = self.counts.shape
+        if divisions == current_divisions and chassis == current_chassis:
+            return
+
+        padding = ((0, divisions - current_divisions), (0, chassis - current_chassis))
+        self.counts = np.pad(self.counts, padding)
+        self.sums = np.pad(self.sums, padding + ((0, 0),))
+
+    def encode(self, divisions, chassis):
+        """Converts division and chassis labels into array indexes, registering unseen labels."""
+        division_codes = self._codes(divisions, self.divisions)
+        chassis_codes = self._codes(chassis, self.chassis)
+        self._resize()
+
+        return division_codes, chassis_codes
+
+    def update(self, division_codes, chassis_codes, stats):
+        """Adds rows of stats to their division baseline and to the general one."""
+        np.add.at(self.counts, (division_codes, chassis_codes), 1)
+        np.add.at(self.sums, (division_codes, chassis_codes), stats)
+
+        specific = division_codes != 0
+        np.add.at(self.counts, (0, chassis_codes[specific]), 1)
+        np.add.at(self.sums, (0, chassis_codes[specific]), stats[specific])
+
+    def means(self, division_codes, chassis_codes):
+        counts = self.counts[division_codes, chassis_codes]
+        return self.sums[division_codes, chassis_codes] / np.maximum(counts, 1)[:, None]
+
+    def performance(self, divisions, chassis, stats):
+        """
+        Normalizes a whole team's stats against the historical average for their chassis.
+
+        Pilots in chassis without a trusted baseline get a weight of 1 and their stats are added to it.
+
+        Args:
+            divisions (array): Division of every pilot.
+            chassis (array): Chassis of every pilot.
+            stats (array): (pilots x indicators) performance values.
+
+        Returns:
+            array: Performance weight of every pilot.
+        """
+        stats = np.asarray(stats, dtype=np.float64)
+        division_codes, chassis_codes = self.encode(divisions, chassis)
+
+        valid = self.counts[division_codes, chassis_codes] >= self.threshold
+        means = self.means(division_codes, chassis_codes)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            normalized = np.clip(stats / means, self.floor, self.ceiling)
+        normalized = np.where(means == 0, 1.0, normalized)
+        weights = np.where(valid, normalized.mean(axis=1), 1.0)
+
+        invalid = ~valid
+        self.update(division_codes[invalid], chassis_codes[invalid], stats[invalid])
+
+        return weights
+
+    def export(self):
+        """Returns baseline state as plain arrays that can be stored and loaded back with `from_export()`."""
+        return {
+            'indicators': np.array(self.indicators),
+            'threshold': np.array(self.threshold),
+            'limits': np.array([self.floor, self.ceiling]),
+            'divisions': np.array([label for label in self.divisions][1:], dtype=str),
+            'chassis': np.array([label for label in self.chassis], dtype=str),
+            'counts': self.counts,
+            'sums': self.sums
+        }
+
+    @classmethod
+    def from_export(cls, data):
+        floor, ceiling = data['limits']
+        baseline = cls(data['indicators'].tolist(), int(data['threshold']), float(floor), float(ceiling))
+        baseline.divisions = {None: 0, **{label: index + 1 for index, label in enumerate(data['divisions'].tolist())}}
+        baseline.chassis = {label: index for index, label in enumerate(data['chassis'].tolist())}
+        baseline.counts = np.array(data['counts'], dtype=np.int64)
+        baseline.sums = np.array(data['sums'], dtype=np.float64)
+
+        return baseline
+
+    def save(self, file_name):
+        np.savez(file_name, **self.export())
+
+    @classmethod
+    def load(cls, file_name):
+        with np.load(file_name) as data:
+            return cls.from_export(data)
+
+    @classmethod
+    def from_history(cls, df, indicators, threshold=10):
+        """
+        Builds the baseline from historical data sorted by completion time.
+
+        Only the first `threshold` uses of every chassis in a division are counted,
+        the same rows the online baseline collects before it is trusted.
+        """
+        baseline = cls(indicators, threshold)
+
+        first_uses = df[df.groupby(['Division', 'Chassis']).cumcount() < threshold]
+        division_codes, chassis_codes = baseline.encode(first_uses['Division'].to_numpy(), first_uses['Chassis'].to_numpy())
+        baseline.update(division_codes, chassis_codes, first_uses[baseline.indicators].to_numpy(dtype=np.float64))
+
+        return baseline
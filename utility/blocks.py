@@ -2,26 +2,47 @@ import streamlit as st
 
 from utility.methods import filter_dataframe, unique
 
-def filters_block(df, options, multiselect=True):
+def filters_block(df, options, multiselect=True, index=None):
+    """
+    Draws a filter per option, every filter lists only values left by the previous ones.
+
+    With a `Filter_Index` built for `df` selections are combined as bitsets
+    and the frame is sliced once at the end. Without `df` every option must be
+    indexed and nothing is sliced, see `filter_options()`.
+    """
     size = len(options)
     columns = st.columns(size)
     col_index = 0
 
     if not size:
         return options
+
+    if df is None and (index is None or any(key not in index for key in options)):
+        raise Exception('Options without a frame must all be indexed')
+    if index is not None and df is not None and index.rows != df.shape[0]:
+        index = None
+    bitset = None
     
     for key, representation in options.items():
         column = columns[col_index]
 
         with column:
-            values = unique(df, key)
+            indexed = index is not None and key in index
+            values = index.options(key, bitset) if indexed else unique(df, key)
             placeholder = representation if representation else key
             if multiselect:
                 selected_values = st.multiselect('Select value', values, placeholder=placeholder, label_visibility='hidden')
             else:
                 selected_values = st.selectbox('Select value', values, index=None, placeholder=placeholder, label_visibility='hidden')
 
-            if selected_values:
+            if selected_values and indexed:
+                mask = index.mask(key, selected_values)
+                bitset = mask if bitset is None else bitset & mask
+                options[key] = selected_values
+            elif selected_values:
+                if bitset is not None:
+                    df, bitset = df.iloc[index.positions(bitset)], None
+                    index = None
                 df = filter_dataframe(df, key, selected_values)
                 options[key] = selected_values
             else:
@@ -29,8 +50,19 @@ def filters_block(df, options, multiselect=True):
 
         col_index += 1
 
+    if bitset is not None and df is not None:
+        df = df.iloc[index.positions(bitset)]
+
     return df, options
 
+def filter_options(options, index, multiselect=True):
+    """
+    Draws the filters of `filters_block()` from the index alone and returns the selected options.
+
+    For pages that filter inside a cached function (see `apply_filters()`), the frame is neither loaded nor sliced here.
+    """
+    return filters_block(None, options, multiselect, index)[1]
+
 def metrics_block(metrics, columns = None):
     if not metrics:
         return
@@ -68,3 +100,14 @@ def charts_block(charts, columns = None):
         index += 1
         if index >= columns:
             index = 0
+
+def duos_block(duos, first='Pilot 1', second='Pilot 2'):
+    if duos.empty:
+        st.info('No duos with enough games together.')
+        return
+
+    duos = duos[['Pilot1', 'Pilot2', 'Games', 'Wins', 'WinRate', 'Synergy']].rename(columns={'Pilot1': first, 'Pilot2': second, 'WinRate': 'Win rate'})
+    df_height = 35 * (duos.shape[0] + 1) + 3
+
+    duos = duos.style.format(subset=['Win rate', 'Synergy'], formatter="{:.0%}")
+    st.dataframe(duos, hide_index=True, use_container_width=True, height=df_height)
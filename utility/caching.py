@@ -1,6 +1,16 @@
+import pandas as pd
+import sys
+
+from functools import wraps
+from threading import Lock
+from cachetools import LRUCache
+
 DEFAULT_CACHE_TTL = 180
 CACHE_TTL = DEFAULT_CACHE_TTL
 
+# Memory budget of the process-wide page results cache, in bytes
+RESULT_CACHE_BUDGET = 256 * 1024 * 1024
+
 def disable_caching():
     global CACHE_TTL
     CACHE_TTL = 0
@@ -8,3 +18,85 @@ def disable_caching():
 def enable_caching():
     global CACHE_TTL
     CACHE_TTL = DEFAULT_CACHE_TTL
+
+def result_size(value):
+    """Approximate memory used by a cached result in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_size(key) + result_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_size(item) for item in value)
+
+    return sys.getsizeof(value)
+
+class Result_Cache(LRUCache):
+    def __init__(self, budget=RESULT_CACHE_BUDGET):
+        """
+        LRU cache of page aggregates shared by all sessions of the process.
+
+        Args:
+            budget (int): Maximum total size of the cached results in bytes.
+        """
+        super().__init__(maxsize=budget, getsizeof=result_size)
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def get_or_compute(self, key, function, *args):
+        with self.lock:
+            if key in self:
+                self.hits += 1
+                return self[key]
+            self.misses += 1
+
+        value = function(*args)
+
+        with self.lock:
+            # Results larger than the whole budget are returned without caching
+            if result_size(value) <= self.maxsize:
+                self[key] = value
+
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                'Hits': self.hits,
+                'Misses': self.misses,
+                'Evictions': self.evictions,
+                'Entries': len(self),
+                'Size': self.currsize,
+                'Budget': self.maxsize
+            }
+
+RESULT_CACHE = Result_Cache()
+
+def page_cache(page):
+    """
+    Caches results of a page aggregate in `RESULT_CACHE`.
+
+    The decorated function takes normalized filters (see `filters_key()`) and the data version
+    as the first two arguments, the key is (page, function, filters, version, other arguments).
+    Cached results are shared by all sessions and must not be mutated, copy them before changing them.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(filters, version, *args):
+            if not CACHE_TTL:
+                return function(filters, version, *args)
+
+            key = (page, function.__name__, filters, version, args)
+            return RESULT_CACHE.get_or_compute(key, function, filters, version, *args)
+
+        return wrapper
+
+    return decorator
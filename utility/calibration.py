@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+from utility.prediction import normal_cdf
+
+def match_predictions(df, model):
+    """
+    Computes pre-match win probability of every rated match in one pass.
+
+    Pre-match ratings are the ratings a pilot had after their previous match,
+    pilots without one get the model defaults.
+
+    Args:
+        df (DataFrame): Comp data with stored `RatingBase` and `RatingUncertainty`, sorted by completion time.
+        model (PlackettLuce): Model that produced the ratings.
+
+    Returns:
+        DataFrame: One row per match with the probability of Team 1 winning and the actual result.
+    """
+    rated = df.dropna(subset=['RatingBase', 'RatingUncertainty'])
+    pilots = rated.groupby('Username')
+    mu = pilots['RatingBase'].shift(1).fillna(model.mu)
+    sigma_squared = pilots['RatingUncertainty'].shift(1).fillna(model.sigma) ** 2
+
+    teams = pd.DataFrame({
+        'MatchID': rated['MatchID'],
+        'Team': rated['Team'],
+        'Mu': mu,
+        'SigmaSquared': sigma_squared
+    }).groupby(['MatchID', 'Team'], sort=False)[['Mu', 'SigmaSquared']].sum().unstack('Team')
+    teams = teams.dropna()
+
+    difference = teams[('Mu', '1')] - teams[('Mu', '2')]
+    variance = 2 * model.beta ** 2 + teams[('SigmaSquared', '1')] + teams[('SigmaSquared', '2')]
+
+    matches = rated.drop_duplicates(subset=['MatchID']).set_index('MatchID').loc[teams.index]
+    predictions = pd.DataFrame({
+        'MatchID': teams.index,
+        'Tournament': matches['Tournament'].to_numpy(),
+        'Division': matches['Division'].to_numpy(),
+        'CompleteTime': matches['CompleteTime'].to_numpy(),
+        'Probability': normal_cdf(difference.to_numpy() / np.sqrt(variance.to_numpy())),
+        'Team1Win': (matches['WinningTeam'] == '1').to_numpy().astype(int)
+    })
+
+    return predictions
+
+def prediction_quality(df):
+    """Accuracy, log-loss and Brier score of the predictions in `df`."""
+    probability = df['Probability'].clip(1e-9, 1 - 1e-9)
+    outcome = df['Team1Win']
+
+    return pd.Series({
+        'Matches': df.shape[0],
+        'Accuracy': ((probability > 0.5) == (outcome == 1)).mean(),
+        'LogLoss': -(outcome * np.log(probability) + (1 - outcome) * np.log(1 - probability)).mean(),
+        'Brier': ((probability - outcome) ** 2).mean()
+    })
+
+def grouped_quality(df, key):
+    """Prediction quality per group, computed from grouped sums without per-group Python calls."""
+    probability = df['Probability'].clip(1e-9, 1 - 1e-9)
+    outcome = df['Team1Win']
+
+    values = pd.DataFrame({
+        key: df[key],
+        'Matches': 1,
+        'Correct': ((probability > 0.5) == (outcome == 1)).astype(int),
+        'LogLoss': -(outcome * np.log(probability) + (1 - outcome) * np.log(1 - probability)),
+        'Brier': (probability - outcome) ** 2
+    }).groupby(key).sum()
+
+    result = pd.DataFrame({
+        'Matches': values['Matches'],
+        'Accuracy': values['Correct'] / values['Matches'],
+        'LogLoss': values['LogLoss'] / values['Matches'],
+        'Brier': values['Brier'] / values['Matches']
+    })
+
+    return result.reset_index()
+
+def reliability_bins(df, bins=10):
+    """Bins predicted probabilities and compares them with observed win frequency."""
+    edges = np.linspace(0, 1, bins + 1)
+    bin_index = np.clip(np.digitize(df['Probability'], edges) - 1, 0, bins - 1)
+
+    values = pd.DataFrame({
+        'Bin': bin_index,
+        'Predicted': df['Probability'],
+        'Observed': df['Team1Win']
+    }).groupby('Bin').agg(
+        Predicted=('Predicted', 'mean'),
+        Observed=('Observed', 'mean'),
+        Matches=('Observed', 'count')
+    ).reset_index()
+
+    return values
+
+def calibration_report(predictions, window='M'):
+    """
+    Builds every table of the rating report.
+
+    Returns:
+        dict: `overall` quality, `reliability` bins, quality per time `window` and per `division`.
+    """
+    predictions = predictions.assign(
+        Period=pd.to_datetime(predictions['CompleteTime'], format='ISO8601', utc=True).dt.tz_convert(None).dt.to_period(window).dt.to_timestamp()
+    )
+
+    return {
+        'overall': prediction_quality(predictions),
+        'reliability': reliability_bins(predictions),
+        'periods': grouped_quality(predictions, 'Period'),
+        'divisions': grouped_quality(predictions, 'Division')
+    }
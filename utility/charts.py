@@ -1,15 +1,63 @@
 import altair as alt
+import pandas as pd
+import logging
+
+from threading import Lock
+from cachetools import LRUCache
 
 from utility.globals import get_labels_angle
+from utility.methods import downsample_lttb
 
 LABELS_ANGLE = get_labels_angle()
 
+# Maximum number of rows embedded into a single chart spec
+MAX_CHART_ROWS = 5000
+
+CHART_CACHE = LRUCache(maxsize=256)
+CHART_CACHE_LOCK = Lock()
+
+logger = logging.getLogger(__name__)
+
 # SETTINGS
 
 def update_settings():
     global LABELS_ANGLE
     LABELS_ANGLE = get_labels_angle()
 
+# DATA
+
+def embedded(df, columns=None, title='chart', series=None):
+    """
+    Prepares chart data: keeps only the encoded `columns`.
+
+    Series (`(x, y)` column names) over `MAX_CHART_ROWS` are reduced with Largest-Triangle-Three-Buckets,
+    other frames are aggregates and are embedded whole, a warning is logged for them.
+    """
+    if columns:
+        df = df[list(dict.fromkeys(columns))]
+
+    if df.shape[0] > MAX_CHART_ROWS:
+        if series:
+            x_axis, y_axis = series
+            df = df.iloc[downsample_lttb(df[x_axis], df[y_axis], MAX_CHART_ROWS)]
+        else:
+            logger.warning('Chart "%s" embeds %d rows', title, df.shape[0])
+
+    return df
+
+def cached_chart(name, version, build, *args):
+    """Builds a chart once per data version and labels angle, `build(*args)` should return the chart."""
+    update_settings()
+    key = (name, version, LABELS_ANGLE)
+    with CHART_CACHE_LOCK:
+        chart = CHART_CACHE.get(key)
+    if chart is None:
+        chart = build(*args)
+        with CHART_CACHE_LOCK:
+            CHART_CACHE[key] = chart
+
+    return chart
+
 # BAR CHARTS
 
 def bar_chart(df, title, x_axis, y_axis, style='main'):
@@ -22,12 +70,12 @@ def bar_chart(df, title, x_axis, y_axis, style='main'):
         return bar_chart_main(df, title, x_axis, y_axis)
 
 def bar_chart_main(df, title, x_axis, y_axis):
-    return alt.Chart(df, title=title).mark_bar().encode(
+    return alt.Chart(embedded(df, [x_axis, y_axis], title), title=title).mark_bar().encode(
         x=alt.X(f'{x_axis}:O', sort=None, axis=alt.Axis(labelAngle=LABELS_ANGLE), title=None),
         y=alt.Y(y_axis, title=None))
 
 def bar_chart_alternate(df, title, x_axis, y_axis):
-    return alt.Chart(df, title=title).mark_bar().encode(
+    return alt.Chart(embedded(df, [x_axis, y_axis], title), title=title).mark_bar().encode(
         x=alt.X(x_axis, sort=None, axis=alt.Axis(labelAngle=LABELS_ANGLE), title=None),
         y=alt.Y(y_axis, title=None)
     ).configure_bar(
@@ -36,7 +84,7 @@ def bar_chart_alternate(df, title, x_axis, y_axis):
     )
 
 def bar_chart_team2(df, title, x_axis, y_axis):
-    return alt.Chart(df, title=title).mark_bar().encode(
+    return alt.Chart(embedded(df, [x_axis, y_axis], title), title=title).mark_bar().encode(
         x=alt.X(x_axis, sort=None, axis=alt.Axis(labelAngle=LABELS_ANGLE), title=None),
         y=alt.Y(y_axis, title=None)
     ).configure_bar(
@@ -46,7 +94,7 @@ def bar_chart_team2(df, title, x_axis, y_axis):
 
 def horizontal_bar_chart_match_duration(df):
     update_settings()
-    return alt.Chart(df, title='Average match duration (min)').mark_bar().encode(
+    return alt.Chart(embedded(df, ['Team', 'Duration']), title='Average match duration (min)').mark_bar().encode(
         x=alt.X('Duration:Q', title=None),
         y=alt.Y('Team:N', title=None, sort=None),
         tooltip=['Team', alt.Tooltip('Duration:Q', format='.2f')]
@@ -56,7 +104,7 @@ def horizontal_bar_chart_match_duration(df):
 
 def stacked_bar_chart(df, title, x_axis, y_axis, color):
     update_settings()
-    return alt.Chart(df, title=title).mark_bar().encode(
+    return alt.Chart(embedded(df, [x_axis, y_axis, color], title), title=title).mark_bar().encode(
         x=alt.X(f'{x_axis}:N', sort=alt.EncodingSortField(field=y_axis, op='sum', order='descending'), axis=alt.Axis(labelAngle=LABELS_ANGLE), title=None),
         y=alt.Y(f'{y_axis}:Q', title=None),
         color=alt.Color(f'{color}:N', legend=alt.Legend(title=color), scale=alt.Scale(domain=['1', '2'], range=['lightskyblue', 'orangered'])),
@@ -70,7 +118,7 @@ def stacked_ordered_bar_chart(df, title, x_axis, y_axis, color, order, scheme=No
     if not scheme:
         scheme = 'category20c'
     
-    chart = alt.Chart(df, title=title).transform_calculate(
+    chart = alt.Chart(embedded(df, [x_axis, y_axis, color], title), title=title).transform_calculate(
         order=f"-indexof({order}, datum.Origin)"
     ).mark_bar().encode(
         x=alt.X(f'{x_axis}:O', axis=alt.Axis(title=x_axis), sort=None),
@@ -88,7 +136,7 @@ def stacked_ordered_bar_chart(df, title, x_axis, y_axis, color, order, scheme=No
 def negative_stacked_bar_chart_mech_usage(df):
     update_settings()
 
-    base = alt.Chart(df, title='Mech usage by tonnage').mark_bar().encode(
+    base = alt.Chart(embedded(df, ['Tonnage', 'Positive', 'Negative', 'Result', 'count']), title='Mech usage by tonnage').mark_bar().encode(
         x=alt.X('Tonnage:N', title=None, sort=None, axis=alt.Axis(labelAngle=LABELS_ANGLE)),
         y=alt.Y('Positive:Q', title=None, stack='zero'),
         y2=alt.Y2('Negative:Q'),
@@ -109,7 +157,7 @@ def negative_horizontal_stacked_bar_chart_map_stats(df, title):
     lower_bound = df['Negative'].min()
     ticks = int(upper_bound - lower_bound)
 
-    base = alt.Chart(df, title=title).mark_bar().encode(
+    base = alt.Chart(embedded(df, ['Map', 'Positive', 'Negative', 'Result', 'count'], title), title=title).mark_bar().encode(
         x=alt.X('Positive:Q', title=None, stack='zero', sort=None).axis(tickCount=ticks),
         y=alt.Y('Map:N', title=None, sort=None),
         x2=alt.X2('Negative:Q'),
@@ -123,11 +171,61 @@ def negative_horizontal_stacked_bar_chart_map_stats(df, title):
     )
     return bars
 
+# HEATMAPS
+
+def heatmap_chart_matchups(df, rows, columns):
+    """Win rate of every `rows` team against every `columns` team, cells of pairs that never met stay empty."""
+    update_settings()
+    data = embedded(df, ['Team', 'Opponent', 'Games', 'Wins', 'Losses', 'WinRate'], 'Head-to-head')
+
+    base = alt.Chart(data).encode(
+        x=alt.X('Opponent:N', sort=columns, title=None, axis=alt.Axis(labelAngle=LABELS_ANGLE, orient='top')),
+        y=alt.Y('Team:N', sort=rows, title=None)
+    )
+    cells = base.mark_rect().encode(
+        color=alt.Color('WinRate:Q', scale=alt.Scale(domain=[0, 1], scheme='redyellowgreen'), legend=alt.Legend(title='Win rate', format='.0%')),
+        tooltip=[
+            alt.Tooltip('Team:N', title='Team'),
+            alt.Tooltip('Opponent:N', title='Opponent'),
+            alt.Tooltip('Games:Q', title='Games'),
+            alt.Tooltip('Wins:Q', title='Wins'),
+            alt.Tooltip('Losses:Q', title='Losses'),
+            alt.Tooltip('WinRate:Q', title='Win rate', format='.0%')
+        ]
+    )
+    text = base.transform_calculate(
+        Record='datum.Wins + "-" + datum.Losses'
+    ).mark_text(fontSize=10).encode(
+        text='Record:N'
+    )
+
+    return (cells + text).properties(height=max(300, 25 * len(rows)))
+
 # LINE CHARTS
 
 def line_chart_submitted_games(df):
+    """Matches stored per month, `df` has `Month` (first day, text or date) and `Games` columns."""
     update_settings()
-    return alt.Chart(df).mark_line(color='firebrick').encode(
-        alt.X('yearmonth(CompleteTime):T', title='Month'),
-        alt.Y('distinct(MatchID)', type='nominal', title='Submitted Games')
+    data = pd.DataFrame({'Month': pd.to_datetime(df['Month']), 'Games': df['Games']}).sort_values('Month')
+
+    return alt.Chart(embedded(data)).mark_line(color='firebrick').encode(
+        alt.X('yearmonth(Month):T', title='Month'),
+        alt.Y('Games:Q', title='Submitted Games')
     )
+
+# SCATTER CHARTS
+
+def scatter_chart_rating_uncertainty(df):
+    """Latest mean rating against uncertainty of every pilot, `df` has one row per pilot."""
+    data = embedded(df, ['Username', 'RatingBase', 'RatingUncertainty', 'TotalGames'], 'Base rating vs. Uncertainty level')
+
+    return alt.Chart(data).mark_point(opacity=0.5).encode(
+        x=alt.X('RatingBase:Q', title='Mean Rating (Mu)'),
+        y=alt.Y('RatingUncertainty:Q', title='Uncertainty (Sigma)'),
+        color=alt.Color('TotalGames:Q', scale=alt.Scale(scheme='viridis'), title='Games Played'),
+        tooltip=['Username', 'RatingBase', 'RatingUncertainty', 'TotalGames']
+    ).properties(
+        title="Base rating vs. Uncertainty level",
+        width=800,
+        height=500
+    ).interactive()
@@ -0,0 +1,191 @@
+import streamlit as st
+import sqlite3 as sql
+import pandas as pd
+import numpy as np
+
+from os import path, makedirs, replace, close
+from tempfile import mkstemp
+
+from utility.globals import DB_NAME
+from utility.database import initialize_database, data_version, match_data_version
+from utility.caching import CACHE_TTL
+
+CUBE_DIR = f'{path.splitext(DB_NAME)[0]}.cube'
+
+# Match data version the stored cuboids were built from, see `match_data_version()`
+CUBE_VERSION_FILE = path.join(CUBE_DIR, 'version')
+
+PILOT_MEASURES = {
+    'Uses': ('MatchID', 'count'),
+    'Wins': ('Win', 'sum'),
+    'Deaths': ('Death', 'sum'),
+    'Kills': ('Kills', 'sum'),
+    'KillsMostDamage': ('KillsMostDamage', 'sum'),
+    'Assists': ('Assists', 'sum'),
+    'ComponentsDestroyed': ('ComponentsDestroyed', 'sum'),
+    'MatchScore': ('MatchScore', 'sum'),
+    'Damage': ('Damage', 'sum'),
+    'TeamDamage': ('TeamDamage', 'sum'),
+    'Score': ('Score', 'sum')
+}
+
+# Chosen cuboids: source table, grouping dimensions and measures as (column, aggregation)
+CUBOIDS = {
+    'mechs': {
+        'source': 'CompData',
+        'dimensions': ['Tournament', 'Division', 'Class', 'Chassis', 'Mech', 'Tonnage'],
+        'measures': PILOT_MEASURES
+    },
+    'map_chassis': {
+        'source': 'CompData',
+        'dimensions': ['Tournament', 'Division', 'TeamName', 'Map', 'Chassis'],
+        'measures': {'Uses': ('MatchID', 'count'), 'Wins': ('Win', 'sum')}
+    },
+    'lances': {
+        'source': 'CompData',
+        'dimensions': ['Tournament', 'Division', 'TeamName', 'Map', 'Team', 'Lance', 'Class'],
+        'measures': {'Uses': ('MatchID', 'count')}
+    },
+    'players': {
+        'source': 'CompData',
+        'dimensions': ['Tournament', 'Division', 'TeamName', 'Username'],
+        'measures': {'Uses': ('MatchID', 'count'), 'Wins': ('Win', 'sum')}
+    },
+    'matches': {
+        'source': 'Matches',
+        'dimensions': ['Tournament', 'Division', 'Map', 'Team1Name', 'Team2Name'],
+        'measures': {
+            'Games': ('MatchID', 'count'),
+            'Team1Wins': ('Team1Win', 'sum'),
+            'Duration': ('Duration', 'sum'),
+            'FirstTime': ('MatchTime', 'min'),
+            'LastTime': ('MatchTime', 'max')
+        }
+    },
+    'months': {
+        'source': 'Matches',
+        'dimensions': ['Month'],
+        'measures': {'Games': ('MatchID', 'count')}
+    },
+    'teams': {
+        'source': 'MatchTeams',
+        'dimensions': ['Tournament', 'Division', 'Map', 'TeamName', 'Team'],
+        'measures': {'Games': ('MatchID', 'count'), 'Wins': ('Win', 'sum'), 'Duration': ('Duration', 'sum')}
+    }
+}
+
+# Filters matching any of several dimensions, e.g. a team plays on either side of a match
+ANY_OF = {
+    'matches': {'TeamName': ['Team1Name', 'Team2Name']}
+}
+
+ROLLUP = {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}
+
+SOURCES = {
+    'CompData': 'SELECT * FROM CompData',
+    'Matches': "SELECT *, WinningTeam = '1' AS Team1Win, strftime('%Y-%m-01', MatchTime, 'unixepoch') AS Month FROM Matches",
+    'MatchTeams': 'SELECT * FROM MatchTeams'
+}
+
+def cuboid_file(name):
+    return path.join(CUBE_DIR, f'{name}.parquet')
+
+def write_atomically(file, write):
+    """Readers never see a partially written file, concurrent writers use separate temporary files."""
+    descriptor, temporary_file = mkstemp(dir=CUBE_DIR, prefix=f'{path.basename(file)}.', suffix='.tmp')
+    close(descriptor)
+    write(temporary_file)
+    replace(temporary_file, file)
+
+def build_cube():
+    """Aggregates every cuboid from the database and stores them in Parquet files."""
+    initialize_database()
+    makedirs(CUBE_DIR, exist_ok=True)
+
+    # Read before the data, a write during the build leaves the cube outdated
+    version = match_data_version()
+
+    conn = sql.connect(DB_NAME)
+    sources = {}
+    for name, cuboid in CUBOIDS.items():
+        source = cuboid['source']
+        if source not in sources:
+            sources[source] = pd.read_sql_query(SOURCES[source], conn)
+
+        df = sources[source].groupby(cuboid['dimensions'], dropna=False).agg(**cuboid['measures']).reset_index()
+        write_atomically(cuboid_file(name), lambda file: df.to_parquet(file, index=False))
+    conn.close()
+
+    def write_version(file):
+        with open(file, 'w') as version_file:
+            version_file.write(str(version))
+
+    write_atomically(CUBE_VERSION_FILE, write_version)
+
+def cube_version():
+    if not path.exists(CUBE_VERSION_FILE):
+        return None
+
+    with open(CUBE_VERSION_FILE) as version_file:
+        return int(version_file.read())
+
+def cube_outdated():
+    """
+    Stored cuboids are outdated when matches were stored or renamed since they were built.
+
+    Other writes (ratings, predictions, metadata) do not affect the cube.
+    """
+    if any(not path.exists(cuboid_file(name)) for name in CUBOIDS):
+        return True
+
+    return cube_version() != match_data_version()
+
+@st.cache_resource(ttl=CACHE_TTL)
+def load_cube(version):
+    # Writers rebuild the cube (see `batch_request()`), this covers new deployments and other writers
+    if cube_outdated():
+        build_cube()
+
+    return {name: pd.read_parquet(cuboid_file(name)) for name in CUBOIDS}
+
+def cuboid(name):
+    return load_cube(data_version())[name]
+
+def slice_cuboid(name, filters=None):
+    """
+    Rows of a cuboid matching the filters.
+
+    Args:
+        name (str): Cuboid name, see `CUBOIDS`.
+        filters (dict | tuple): Dimension to a value or a list of values, `filters_key()` output is accepted too.
+    """
+    df = cuboid(name)
+    for column, value in dict(filters or {}).items():
+        values = list(value) if isinstance(value, (list, tuple)) else [value]
+        columns = ANY_OF.get(name, {}).get(column, [column])
+        if any(column not in df.columns for column in columns):
+            raise Exception(f'Cuboid `{name}` has no dimension `{column}`')
+
+        df = df[np.logical_or.reduce([df[column].isin(values) for column in columns])]
+
+    return df
+
+def query(name, by=None, filters=None, measures=None):
+    """
+    Slices a cuboid and rolls it up to the `by` dimensions.
+
+    Returns:
+        DataFrame | Series: One row per group with dimensions as columns, totals if `by` is empty.
+    """
+    measures = measures or list(CUBOIDS[name]['measures'])
+    aggregations = {measure: ROLLUP[CUBOIDS[name]['measures'][measure][1]] for measure in measures}
+
+    df = slice_cuboid(name, filters)
+    if not by:
+        return df[measures].agg(aggregations)
+
+    return df.groupby(list(by), as_index=False).agg(aggregations)
+
+def distinct(name, column, filters=None):
+    """Number of distinct members of a dimension in the slice."""
+    return slice_cuboid(name, filters)[column].nunique()
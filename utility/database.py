@@ -1,12 +1,113 @@
 import streamlit as st
 import sqlite3 as sql
 import pandas as pd
+import numpy as np
+import json
 
-from os import path
+from os import path, stat
+from hashlib import blake2b
 
 from utility.globals import DB_NAME
 from utility.caching import CACHE_TTL
 
+# Columns computed from the API data when a match is stored, see `computed_columns()`
+COMPUTED_COLUMNS = {
+    'MatchTime': 'INTEGER',
+    'Duration': 'INTEGER',
+    'Win': 'INTEGER',
+    'Death': 'INTEGER',
+    'OpponentTeamName': 'TEXT'
+}
+
+# Match-level fact tables, one row per match and one row per (match, team)
+FACT_TABLES = {
+    'Matches': """CREATE TABLE IF NOT EXISTS Matches (
+        MatchID INTEGER PRIMARY KEY,
+        Tournament TEXT,
+        Division TEXT,
+        Map TEXT,
+        WinningTeam TEXT,
+        Team1Score INTEGER,
+        Team2Score INTEGER,
+        Team1Name TEXT,
+        Team2Name TEXT,
+        Duration INTEGER,
+        MatchTime INTEGER
+    )""",
+    'MatchTeams': """CREATE TABLE IF NOT EXISTS MatchTeams (
+        MatchID INTEGER,
+        Team TEXT,
+        Tournament TEXT,
+        Division TEXT,
+        Map TEXT,
+        TeamName TEXT,
+        OpponentTeamName TEXT,
+        Win INTEGER,
+        Score INTEGER,
+        Pilots INTEGER,
+        Tonnage INTEGER,
+        Kills INTEGER,
+        Damage INTEGER,
+        TeamDamage INTEGER,
+        Deaths INTEGER,
+        Light INTEGER,
+        Medium INTEGER,
+        Heavy INTEGER,
+        Assault INTEGER,
+        Duration INTEGER,
+        MatchTime INTEGER,
+        ChassisLineup TEXT,
+        ChassisSignature INTEGER,
+        ClassLineup TEXT,
+        ClassSignature INTEGER,
+        PRIMARY KEY (MatchID, Team)
+    )"""
+}
+
+# Weekly pre-binned counts, updated incrementally when matches are stored, see `weekly_bins()`
+# Keys are never NULL, NULLs are distinct in a primary key so their counts would not accumulate
+WEEKLY_TABLES = {
+    'WeeklyMechs': """CREATE TABLE IF NOT EXISTS WeeklyMechs (
+        Week INTEGER NOT NULL,
+        Tournament TEXT NOT NULL DEFAULT '',
+        Division TEXT NOT NULL DEFAULT '',
+        Map TEXT NOT NULL DEFAULT '',
+        Class TEXT NOT NULL DEFAULT '',
+        Chassis TEXT NOT NULL DEFAULT '',
+        Mech TEXT NOT NULL DEFAULT '',
+        Uses INTEGER,
+        Wins INTEGER,
+        PRIMARY KEY (Week, Tournament, Division, Map, Class, Chassis, Mech)
+    )""",
+    'WeeklyMaps': """CREATE TABLE IF NOT EXISTS WeeklyMaps (
+        Week INTEGER NOT NULL,
+        Tournament TEXT NOT NULL DEFAULT '',
+        Division TEXT NOT NULL DEFAULT '',
+        Map TEXT NOT NULL DEFAULT '',
+        Games INTEGER,
+        Team1Wins INTEGER,
+        PRIMARY KEY (Week, Tournament, Division, Map)
+    )"""
+}
+
+# Weeks start on Monday, the epoch started on Thursday
+WEEK = 7 * 24 * 60 * 60
+WEEK_OFFSET = 4 * 24 * 60 * 60
+
+# Lineup columns added to MatchTeams after its first version, see `lineup_signatures()`
+LINEUP_COLUMNS = {
+    'ChassisLineup': 'TEXT',
+    'ChassisSignature': 'INTEGER',
+    'ClassLineup': 'TEXT',
+    'ClassSignature': 'INTEGER'
+}
+
+# Signatures are looked up directly, e.g. all drops with the same composition
+FACT_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS MatchTeamsChassisSignature ON MatchTeams (ChassisSignature)',
+    'CREATE INDEX IF NOT EXISTS MatchTeamsClassSignature ON MatchTeams (ClassSignature)'
+]
+
 def initialize_database():
     if not path.exists(DB_NAME):
         conn = sql.connect(DB_NAME)
@@ -44,23 +145,362 @@ def initialize_database():
             Damage INTEGER,
             TeamDamage INTEGER,
             Rating INTEGER,
-            Rating_change INTEGER
+            Rating_change INTEGER,
+            MatchTime INTEGER,
+            Duration INTEGER,
+            Win INTEGER,
+            Death INTEGER,
+            OpponentTeamName TEXT
         )"""
 
         cursor.execute(create_table_sql)
         conn.commit()
         conn.close()
 
-@st.cache_data(ttl=CACHE_TTL)
-def read_comp_data():
+    migrate_database()
+
+def computed_columns(df):
+    """
+    Computes stored columns derived from the API data.
+
+    Args:
+        df (DataFrame): Rows of complete matches, opponents are looked up within the frame.
+
+    Returns:
+        DataFrame: `COMPUTED_COLUMNS` indexed like `df`.
+    """
+    match_time = pd.to_datetime(df['CompleteTime'], format='ISO8601', utc=True)
+    # Team is stored as TEXT, API data may come with numbers
+    teams = df['Team'].astype(str)
+    team_names = df['TeamName'].groupby([df['MatchID'], teams]).max()
+    opponents = pd.MultiIndex.from_arrays([df['MatchID'], np.where(teams == '1', '2', '1')])
+
+    return pd.DataFrame({
+        'MatchTime': (match_time - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1),
+        'Duration': pd.to_numeric(df['MatchDuration'], errors='coerce'),
+        'Win': df['MatchResult'].eq('WIN').astype(int),
+        'Death': df['HealthPercentage'].eq(0).astype(int),
+        'OpponentTeamName': team_names.reindex(opponents).to_numpy()
+    }, index=df.index)
+
+def migrate_computed_columns(conn):
+    """Adds computed columns to databases created before them and fills them for stored matches."""
+    existing = [row[1] for row in conn.execute('PRAGMA table_info(CompData)')]
+    for column, column_type in COMPUTED_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE CompData ADD COLUMN {column} {column_type}')
+    conn.commit()
+
+    if conn.execute('SELECT 1 FROM CompData WHERE MatchTime IS NULL LIMIT 1').fetchone():
+        df = pd.read_sql_query("""
+            SELECT ID, MatchID, CompleteTime, MatchDuration, MatchResult, HealthPercentage, Team, TeamName
+            FROM CompData
+            WHERE MatchID IN (SELECT MatchID FROM CompData WHERE MatchTime IS NULL)""", conn, index_col='ID')
+        values = computed_columns(df).astype(object).where(lambda values: values.notna(), None)
+        rows = [(*row, index) for index, row in zip(values.index, values.itertuples(index=False))]
+        conn.executemany(f'UPDATE CompData SET {", ".join(f"{column} = ?" for column in COMPUTED_COLUMNS)} WHERE ID = ?', rows)
+        conn.commit()
+
+def migrate_match_facts(conn):
+    """Creates the fact tables with lineup signatures and fills them for stored matches."""
+    for create_table_sql in FACT_TABLES.values():
+        conn.execute(create_table_sql)
+
+    existing = [row[1] for row in conn.execute('PRAGMA table_info(MatchTeams)')]
+    for column, column_type in LINEUP_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE MatchTeams ADD COLUMN {column} {column_type}')
+
+    for create_index_sql in FACT_INDEXES:
+        conn.execute(create_index_sql)
+    conn.commit()
+
+    # Matches without facts or with facts written before lineup signatures
+    missing = 'SELECT MatchID FROM CompData WHERE MatchID NOT IN (SELECT MatchID FROM Matches) UNION SELECT MatchID FROM MatchTeams WHERE ChassisSignature IS NULL'
+    if conn.execute(f'{missing} LIMIT 1').fetchone():
+        df = pd.read_sql_query(f'SELECT * FROM CompData WHERE MatchID IN ({missing})', conn, index_col='ID')
+        write_match_facts(conn, df)
+        conn.commit()
+
+def migrate_weekly_bins(conn):
+    """(Re)creates the weekly tables and bins all stored matches, bins written with NULL keys are dropped."""
+    for table, create_table_sql in WEEKLY_TABLES.items():
+        conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.execute(create_table_sql)
+    df = pd.read_sql_query('SELECT * FROM CompData', conn, index_col='ID')
+    write_weekly_bins(conn, df)
+    conn.commit()
+
+# Migration steps in order, databases at schema version `n` run the steps after the first `n`
+MIGRATIONS = [migrate_computed_columns, migrate_match_facts, migrate_weekly_bins]
+
+# Schema version stored in metadata once `migrate_database()` has run every step
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate_database():
+    """Brings databases created by older versions to `SCHEMA_VERSION`, steps finished before are skipped."""
+    schema_version = int(get_metadata('SchemaVersion', 0))
+    if schema_version >= SCHEMA_VERSION:
+        return
+
+    conn = sql.connect(DB_NAME)
+    for migration in MIGRATIONS[schema_version:]:
+        migration(conn)
+    conn.close()
+
+    set_metadata('SchemaVersion', SCHEMA_VERSION)
+
+def match_facts(df):
+    """
+    Aggregates pilot rows of complete matches into the fact tables.
+
+    Args:
+        df (DataFrame): Pilot rows with computed columns.
+
+    Returns:
+        tuple: `Matches` and `MatchTeams` frames.
+    """
+    rows = df.assign(
+        Team=df['Team'].astype(str),
+        Light=df['Class'].eq('LIGHT').astype(int),
+        Medium=df['Class'].eq('MEDIUM').astype(int),
+        Heavy=df['Class'].eq('HEAVY').astype(int),
+        Assault=df['Class'].eq('ASSAULT').astype(int)
+    )
+
+    teams = rows.groupby(['MatchID', 'Team'], as_index=False).agg(
+        Tournament=('Tournament', 'first'),
+        Division=('Division', 'max'),
+        Map=('Map', 'first'),
+        TeamName=('TeamName', 'max'),
+        OpponentTeamName=('OpponentTeamName', 'max'),
+        Win=('Win', 'max'),
+        Score=('Score', 'max'),
+        Pilots=('Username', 'count'),
+        Tonnage=('Tonnage', 'sum'),
+        Kills=('Kills', 'sum'),
+        Damage=('Damage', 'sum'),
+        TeamDamage=('TeamDamage', 'sum'),
+        Deaths=('Death', 'sum'),
+        Light=('Light', 'sum'),
+        Medium=('Medium', 'sum'),
+        Heavy=('Heavy', 'sum'),
+        Assault=('Assault', 'sum'),
+        Duration=('Duration', 'first'),
+        MatchTime=('MatchTime', 'first')
+    )
+
+    teams = pd.concat([teams, lineup_signatures(rows, teams)], axis=1)
+
+    names = teams.pivot(index='MatchID', columns='Team', values='TeamName').reindex(columns=['1', '2'])
+    matches = rows.groupby('MatchID', as_index=False).agg(
+        Tournament=('Tournament', 'first'),
+        Division=('Division', 'max'),
+        Map=('Map', 'first'),
+        WinningTeam=('WinningTeam', 'first'),
+        Team1Score=('Team1Score', 'first'),
+        Team2Score=('Team2Score', 'first'),
+        Duration=('Duration', 'first'),
+        MatchTime=('MatchTime', 'first')
+    )
+    matches['Team1Name'] = names['1'].reindex(matches['MatchID']).to_numpy()
+    matches['Team2Name'] = names['2'].reindex(matches['MatchID']).to_numpy()
+
+    return matches, teams
+
+def signature(lineup):
+    """Stable 64-bit hash of a lineup description, stored as a signed SQLite integer."""
+    return int.from_bytes(blake2b(lineup.encode(), digest_size=8).digest(), 'little', signed=True)
+
+def lineup_signatures(rows, teams):
+    """
+    Canonical lineups of every (match, team) and their hashed signatures.
+
+    `ChassisLineup` is the sorted list of chassis, `ClassLineup` the weight class pattern.
+
+    Args:
+        rows (DataFrame): Pilot rows with `Team` as text and weight class indicators.
+        teams (DataFrame): One row per (match, team) with weight class counts.
+
+    Returns:
+        DataFrame: `LINEUP_COLUMNS` indexed like `teams`.
+    """
+    chassis = rows['Chassis'].fillna('').sort_values().groupby([rows['MatchID'], rows['Team']]).agg(', '.join)
+    chassis_lineups = chassis.reindex(pd.MultiIndex.from_frame(teams[['MatchID', 'Team']])).fillna('')
+    class_lineups = 'L' + teams['Light'].astype(str) + ' M' + teams['Medium'].astype(str) + ' H' + teams['Heavy'].astype(str) + ' A' + teams['Assault'].astype(str)
+
+    return pd.DataFrame({
+        'ChassisLineup': chassis_lineups.to_numpy(),
+        'ChassisSignature': chassis_lineups.map(signature).to_numpy(),
+        'ClassLineup': class_lineups,
+        'ClassSignature': class_lineups.map(signature)
+    }, index=teams.index)
+
+def upsert(conn, table, df):
+    values = df.astype(object).where(df.notna(), None)
+    columns = ', '.join(df.columns)
+    placeholders = ', '.join('?' for _ in df.columns)
+    conn.executemany(f'INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})', values.itertuples(index=False))
+
+def write_match_facts(conn, df):
+    matches, teams = match_facts(df)
+    upsert(conn, 'Matches', matches)
+    upsert(conn, 'MatchTeams', teams)
+
+def week_start(match_time):
+    """Epoch seconds of the Monday starting the week of every match time."""
+    return (match_time - WEEK_OFFSET) // WEEK * WEEK + WEEK_OFFSET
+
+def weekly_bins(df):
+    """
+    Bins pilot rows of newly stored matches into weekly counts.
+
+    Returns:
+        tuple: `WeeklyMechs` and `WeeklyMaps` frames.
+    """
+    keys = ['Tournament', 'Division', 'Map', 'Class', 'Chassis', 'Mech']
+    rows = df.assign(Week=week_start(df['MatchTime']), **{key: df[key].fillna('') for key in keys})
+
+    mechs = rows.groupby(['Week', *keys], as_index=False).agg(
+        Uses=('MatchID', 'count'),
+        Wins=('Win', 'sum')
+    )
+
+    matches = rows.drop_duplicates(subset=['MatchID'])
+    maps = matches.assign(Team1Win=matches['WinningTeam'].eq('1').astype(int)).groupby(['Week', 'Tournament', 'Division', 'Map'], as_index=False).agg(
+        Games=('MatchID', 'count'),
+        Team1Wins=('Team1Win', 'sum')
+    )
+
+    return mechs, maps
+
+def accumulate(conn, table, df, keys):
+    """Adds the counts of `df` to the stored ones, rows with new keys are inserted."""
+    values = df.astype(object).where(df.notna(), None)
+    columns = ', '.join(df.columns)
+    placeholders = ', '.join('?' for _ in df.columns)
+    updates = ', '.join(f'{column} = {column} + excluded.{column}' for column in df.columns if column not in keys)
+    conn.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders}) ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {updates}', values.itertuples(index=False))
+
+def write_weekly_bins(conn, df):
+    mechs, maps = weekly_bins(df)
+    accumulate(conn, 'WeeklyMechs', mechs, ['Week', 'Tournament', 'Division', 'Map', 'Class', 'Chassis', 'Mech'])
+    accumulate(conn, 'WeeklyMaps', maps, ['Week', 'Tournament', 'Division', 'Map'])
+
+def data_version():
+    """Changes on every write to the database file, used as a part of cache keys."""
+    if not path.exists(DB_NAME):
+        return 0
+
+    return stat(DB_NAME).st_mtime_ns
+
+DERIVED_COLUMNS = ['Time']
+
+def derive_columns(df):
+    """Adds in-memory columns computed from the stored ones, available when their source column is loaded."""
+    derived = {}
+    if 'MatchTime' in df.columns:
+        derived['Time'] = pd.to_datetime(df['MatchTime'], unit='s')
+
+    return df.assign(**derived)
+
+@st.cache_resource(ttl=CACHE_TTL)
+def comp_data(version, columns=None, where=None):
+    """One read-only frame per projection shared by all sessions, views must not modify it."""
+    initialize_database()
+
+    select = ', '.join(['ID'] + [f'"{column}"' for column in columns]) if columns else '*'
+    conditions, parameters = [], []
+    for column, value in where or ():
+        values = value if isinstance(value, tuple) else (value,)
+        conditions.append(f'"{column}" IN ({", ".join("?" * len(values))})')
+        parameters.extend(values)
+    condition = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+
+    conn = sql.connect(DB_NAME)
+    df = pd.read_sql_query(f"SELECT {select} FROM CompData{condition} ORDER BY CompleteTime, Team, Lance, Username", conn, index_col='ID', params=parameters)
+    conn.close()
+
+    return derive_columns(df)
+
+def read_comp_data(columns=None, where=None):
+    """
+    Reads comp data sorted by completion time, every projection is cached separately.
+
+    Args:
+        columns (list): Columns to load, all of them by default.
+        where (dict): Column to a value or a list of accepted values.
+    """
+    columns = tuple(columns) if columns else None
+    where = tuple(sorted((column, tuple(value) if isinstance(value, list) else value) for column, value in where.items())) if where else None
+
+    return comp_data(data_version(), columns, where)
+
+@st.cache_resource(ttl=CACHE_TTL)
+def fact_table(version, table):
+    """One read-only fact table shared by all sessions, see `FACT_TABLES`."""
+    if table not in FACT_TABLES:
+        raise Exception(f'Unknown fact table `{table}`')
+    initialize_database()
+
+    conn = sql.connect(DB_NAME)
+    df = pd.read_sql_query(f'SELECT * FROM {table} ORDER BY MatchTime, MatchID', conn)
+    conn.close()
+
+    return derive_columns(df)
+
+@st.cache_resource(ttl=CACHE_TTL)
+def weekly_table(version, table):
+    """One read-only weekly table shared by all sessions, see `WEEKLY_TABLES`."""
+    if table not in WEEKLY_TABLES:
+        raise Exception(f'Unknown weekly table `{table}`')
     initialize_database()
 
     conn = sql.connect(DB_NAME)
-    df = pd.read_sql_query("SELECT * FROM CompData ORDER BY CompleteTime, Team, Lance, Username", conn, index_col='ID')
+    df = pd.read_sql_query(f'SELECT * FROM {table} ORDER BY Week', conn)
+    conn.close()
+
+    return df
+
+def read_matches():
+    return fact_table(data_version(), 'Matches')
+
+def read_lineup_drops(signature_column, value):
+    """All (match, team) rows with the lineup signature, served by the signature index."""
+    if signature_column not in ('ChassisSignature', 'ClassSignature'):
+        raise Exception(f'Unknown lineup signature `{signature_column}`')
+
+    conn = sql.connect(DB_NAME)
+    df = pd.read_sql_query(f'SELECT * FROM MatchTeams WHERE {signature_column} = ? ORDER BY MatchTime', conn, params=(int(value),))
     conn.close()
 
     return df
 
+def read_match_teams():
+    return fact_table(data_version(), 'MatchTeams')
+
+# Raw API responses by MatchID, a separate file so archiving does not change the data version
+API_ARCHIVE = f'{path.splitext(DB_NAME)[0]}.api.sqlite3'
+
+def api_archive():
+    conn = sql.connect(API_ARCHIVE, timeout=30)
+    conn.execute('CREATE TABLE IF NOT EXISTS ApiArchive (MatchID INTEGER PRIMARY KEY, Response TEXT, FetchedAt TEXT)')
+    return conn
+
+def read_archived_match(match_id):
+    """Archived API response of a match or None."""
+    conn = api_archive()
+    row = conn.execute('SELECT Response FROM ApiArchive WHERE MatchID = ?', (int(match_id),)).fetchone()
+    conn.close()
+
+    return json.loads(row[0]) if row else None
+
+def archive_match(match_id, response):
+    conn = api_archive()
+    conn.execute("INSERT OR REPLACE INTO ApiArchive VALUES (?, ?, datetime('now'))", (int(match_id), json.dumps(response)))
+    conn.commit()
+    conn.close()
+
 def unique_match_ids():
     conn = sql.connect(DB_NAME)
     cursor = conn.cursor()
@@ -70,11 +510,120 @@ def unique_match_ids():
     return unique_ids
 
 def write_comp_data(df):
+    initialize_database()
+
     conn = sql.connect(DB_NAME)
     if df.shape[0] > 0:
+        df = pd.concat([df, computed_columns(df)], axis=1)
         df.to_sql('CompData', conn, if_exists='append', index=False)
+        write_match_facts(conn, df)
+        write_weekly_bins(conn, df)
+        bump_match_data_version(conn)
+        conn.commit()
+    conn.close()
+
+def table_exists(conn, table):
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+def table_columns(table):
+    conn = sql.connect(DB_NAME)
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
     conn.close()
 
+    return columns
+
+def get_metadata(key, default=None):
+    conn = sql.connect(DB_NAME)
+    conn.execute('CREATE TABLE IF NOT EXISTS Metadata (Key TEXT PRIMARY KEY, Value TEXT)')
+    row = conn.execute('SELECT Value FROM Metadata WHERE Key = ?', (key,)).fetchone()
+    conn.close()
+
+    return row[0] if row else default
+
+def set_metadata(key, value):
+    conn = sql.connect(DB_NAME)
+    conn.execute('CREATE TABLE IF NOT EXISTS Metadata (Key TEXT PRIMARY KEY, Value TEXT)')
+    conn.execute('INSERT INTO Metadata (Key, Value) VALUES (?, ?) ON CONFLICT (Key) DO UPDATE SET Value = excluded.Value', (key, str(value)))
+    conn.commit()
+    conn.close()
+
+def match_data_version():
+    """Changes only when matches are stored or renamed, unlike `data_version()` it ignores ratings and metadata."""
+    return int(get_metadata('MatchDataVersion', 0))
+
+def bump_match_data_version(conn):
+    """Increments the match data version within the transaction of `conn`, the caller commits."""
+    conn.execute('CREATE TABLE IF NOT EXISTS Metadata (Key TEXT PRIMARY KEY, Value TEXT)')
+    conn.execute("INSERT INTO Metadata (Key, Value) VALUES ('MatchDataVersion', '1') ON CONFLICT (Key) DO UPDATE SET Value = CAST(Value AS INTEGER) + 1")
+
+def rating_version():
+    return int(get_metadata('RatingVersion', 0))
+
+def write_rating_history(history, pilots):
+    conn = sql.connect(DB_NAME)
+    pilots.to_sql('Pilots', conn, if_exists='replace', index=False)
+    history.to_sql('RatingHistory', conn, if_exists='replace', index=False)
+    conn.execute('CREATE INDEX IF NOT EXISTS RatingHistoryPilot ON RatingHistory (PilotID, MatchOrdinal)')
+    conn.commit()
+    conn.close()
+
+def write_match_predictions(predictions):
+    conn = sql.connect(DB_NAME)
+    predictions.to_sql('MatchPredictions', conn, if_exists='replace', index=False)
+    conn.close()
+
+    set_metadata('RatingVersion', rating_version() + 1)
+
+def read_match_predictions():
+    conn = sql.connect(DB_NAME)
+    if table_exists(conn, 'MatchPredictions'):
+        df = pd.read_sql_query('SELECT * FROM MatchPredictions', conn)
+    else:
+        df = pd.DataFrame([])
+    conn.close()
+
+    return df
+
+@st.cache_data(ttl=CACHE_TTL)
+def read_rating_history(pilots, version):
+    """
+    Rating history of the selected pilots, ordered and numbered by completion time per username.
+
+    Histories of pilots renamed onto an existing name are merged this way. Databases rated before
+    the `RatingHistory` table existed fall back to the rating columns of comp data.
+
+    Args:
+        pilots (tuple): Usernames.
+        version (int): Data version, see `data_version()`.
+    """
+    columns = ['Username', 'MatchOrdinal', 'MatchID', 'CompleteTime', 'Rating', 'Sigma', 'TeamRating', 'OpponentRating']
+    if not pilots:
+        return pd.DataFrame([], columns=columns)
+
+    conn = sql.connect(DB_NAME)
+    placeholders = ', '.join('?' for _ in pilots)
+    if table_exists(conn, 'RatingHistory'):
+        query = f"""
+            SELECT Username, MatchID, CompleteTime, Rating, Sigma, TeamRating, OpponentRating
+            FROM RatingHistory JOIN Pilots USING (PilotID)
+            WHERE Username IN ({placeholders})"""
+        df = pd.read_sql_query(query, conn, params=list(pilots))
+    else:
+        query = f"""
+            SELECT Username, MatchID, CompleteTime, PilotRating AS Rating, RatingUncertainty AS Sigma, TeamRating, OpponentRating
+            FROM CompData
+            WHERE Username IN ({placeholders}) AND PilotRating IS NOT NULL"""
+        df = pd.read_sql_query(query, conn, params=list(pilots))
+        df['CompleteTime'] = pd.to_datetime(df['CompleteTime'], format='ISO8601', utc=True).astype('int64') // 10**9
+    conn.close()
+
+    df = df.sort_values(['Username', 'CompleteTime', 'MatchID'], kind='stable').reset_index(drop=True)
+    df.insert(1, 'MatchOrdinal', df.groupby('Username').cumcount() + 1)
+
+    return df[columns]
+
 def update_values(column, old_value, new_value):
     initialize_database()
 
@@ -85,6 +634,15 @@ def update_values(column, old_value, new_value):
     result = ''
     try:
         cursor.execute(update_statement, (new_value, old_value))
+        if column == 'TeamName':
+            cursor.execute('UPDATE CompData SET OpponentTeamName = ? WHERE OpponentTeamName = ?', (new_value, old_value))
+            cursor.execute('UPDATE MatchTeams SET TeamName = ? WHERE TeamName = ?', (new_value, old_value))
+            cursor.execute('UPDATE MatchTeams SET OpponentTeamName = ? WHERE OpponentTeamName = ?', (new_value, old_value))
+            cursor.execute('UPDATE Matches SET Team1Name = ? WHERE Team1Name = ?', (new_value, old_value))
+            cursor.execute('UPDATE Matches SET Team2Name = ? WHERE Team2Name = ?', (new_value, old_value))
+        if column == 'Username' and table_exists(conn, 'Pilots'):
+            cursor.execute('UPDATE Pilots SET Username = ? WHERE Username = ?', (new_value, old_value))
+        bump_match_data_version(conn)
         conn.commit()
     except sql.Error as e:
         result = e.message
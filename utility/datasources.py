@@ -29,6 +29,10 @@ def mech_data():
     
     return result
 
+def mech_list_key():
+    """Identity of the current mech list for cache keys, results built while a fetch failed are not reused once it succeeds."""
+    return hash(frozenset(mech_data()))
+
 @st.cache_data(ttl=CACHE_TTL)
 def team_rosters(url):
     result = {}
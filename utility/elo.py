@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_RATING = 1500
+RATING_BASE = 400
+K_FACTOR = 32
+
+def default_k_factor(rating1, rating2, result):
+    return K_FACTOR
+
+def default_rating_base(rating1, rating2, result):
+    return RATING_BASE
+
+def match_arrays(df):
+    """
+    Encodes match data into integer arrays so ratings can be updated without touching pandas.
+
+    Rows are grouped by match in the order matches first appear in the frame,
+    `offsets[i]:offsets[i + 1]` is the slice of the i-th match in every row-aligned array.
+
+    Args:
+        df (DataFrame): Rows with `MatchID`, `Team`, `Username` and `MatchResult` columns.
+
+    Returns:
+        dict: Row-aligned arrays `rows`, `pilots`, `sides`, `wins`, match `offsets` and `pilot_names`.
+    """
+    match_codes, _ = pd.factorize(df['MatchID'], sort=False)
+    rows = np.argsort(match_codes, kind='stable')
+
+    pilots, pilot_names = pd.factorize(df['Username'], sort=False)
+    sides = (df['Team'].to_numpy() == '2').astype(np.intp)
+    wins = (df['MatchResult'].to_numpy() == 'WIN')
+
+    counts = np.bincount(match_codes)
+    offsets = np.zeros(counts.size + 1, dtype=np.intp)
+    np.cumsum(counts, out=offsets[1:])
+
+    return {
+        'rows': rows,
+        'pilots': pilots[rows],
+        'sides': sides[rows],
+        'wins': wins[rows],
+        'offsets': offsets,
+        'pilot_names': pilot_names
+    }
+
+class ELO_Rating_System:
+    def __init__(self, pilots_count, initial_rating=DEFAULT_RATING, k_factor=default_k_factor, rating_base=default_rating_base):
+        """
+        Initializes the classic ELO rating system.
+
+        Args:
+            pilots_count (int): Number of distinct pilots, pilot IDs are indexes in the ratings array.
+            initial_rating (int): Rating of a pilot that haven't played yet.
+            k_factor (callable): Policy `(rating, opponent_rating, wins) -> K`, receives numpy arrays.
+            rating_base (callable): Policy `(rating, opponent_rating, wins) -> base`, receives numpy arrays.
+        """
+        self.ratings = np.full(pilots_count, initial_rating, dtype=np.float64)
+        self.k_factor = k_factor
+        self.rating_base = rating_base
+
+    def process_match(self, pilots, sides, wins):
+        """
+        Updates ratings of the pilots from a single match.
+
+        Each pilot is rated against the floored average rating of the opposing team.
+
+        Returns:
+            tuple: New ratings and rating changes aligned with `pilots`.
+        """
+        ratings = self.ratings[pilots]
+        team_sums = np.bincount(sides, weights=ratings, minlength=2)
+        team_sizes = np.bincount(sides, minlength=2)
+        team_ratings = team_sums // np.maximum(team_sizes, 1)
+        opponent_ratings = team_ratings[1 - sides]
+
+        difference = np.where(wins, opponent_ratings - ratings, ratings - opponent_ratings)
+        expected = 1 / (1 + 10 ** (difference / self.rating_base(ratings, opponent_ratings, wins)))
+        sign = np.where(wins, 1, -1)
+        changes = sign * np.round(self.k_factor(ratings, opponent_ratings, wins) * (1 - expected), 0)
+
+        new_ratings = ratings + changes
+        self.ratings[pilots] = new_ratings
+
+        return new_ratings, changes
+
+    def process(self, arrays):
+        """
+        Rates all matches from `match_arrays()` output.
+
+        Returns:
+            tuple: Ratings and rating changes aligned with the rows of the original frame.
+        """
+        offsets = arrays['offsets']
+        rows = arrays['rows']
+        ratings = np.zeros(rows.size, dtype=np.float64)
+        changes = np.zeros(rows.size, dtype=np.float64)
+
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            ratings[start:stop], changes[start:stop] = self.process_match(
+                arrays['pilots'][start:stop], arrays['sides'][start:stop], arrays['wins'][start:stop])
+
+        result_ratings = np.empty_like(ratings)
+        result_changes = np.empty_like(changes)
+        result_ratings[rows] = ratings
+        result_changes[rows] = changes
+
+        return result_ratings, result_changes
+
+def rating_pass(df, arrays, elo_system=None, skill_system=None, callback=None):
+    """
+    Rates every match once, feeding both rating engines from the same scan.
+
+    Args:
+        df (DataFrame): Comp data sorted by completion time.
+        arrays (dict): `match_arrays()` output for `df`.
+        elo_system (ELO_Rating_System): Optional classic ELO engine sized for `arrays['pilot_names']`.
+        skill_system (MWO_Rating_System): Optional OpenSkill engine.
+        callback (callable): Called with the number of processed matches after every match.
+
+    Returns:
+        DataFrame: Rating columns of the engines that were provided, indexed as `df`.
+    """
+    offsets = arrays['offsets']
+    rows = arrays['rows']
+    index = df.index
+
+    result = pd.DataFrame(index=index)
+    if elo_system is not None:
+        elo_ratings = np.zeros(rows.size, dtype=np.float64)
+        elo_changes = np.zeros(rows.size, dtype=np.float64)
+    if skill_system is not None:
+        skill_columns = ['PilotRating', 'TeamRating', 'OpponentRating', 'RatingBase', 'RatingUncertainty']
+        skill_values = np.zeros((rows.size, len(skill_columns)), dtype=np.float64)
+
+    for match_number, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+        match_rows = rows[start:stop]
+
+        if elo_system is not None:
+            elo_ratings[match_rows], elo_changes[match_rows] = elo_system.process_match(
+                arrays['pilots'][start:stop], arrays['sides'][start:stop], arrays['wins'][start:stop])
+
+        if skill_system is not None:
+            records = skill_system.process_match(df.iloc[match_rows])
+            positions = index.get_indexer(list(records.keys()))
+            skill_values[positions] = [[record[column] for column in skill_columns] for record in records.values()]
+
+        if callback:
+            callback(match_number + 1)
+
+    if elo_system is not None:
+        result['Rating'] = elo_ratings
+        result['Rating_change'] = elo_changes
+    if skill_system is not None:
+        result[skill_columns] = skill_values
+
+    return result
+
+def rating_history(df, arrays, ratings):
+    """
+    Builds a compact per-pilot rating history from `rating_pass()` output.
+
+    Returns:
+        tuple: History rows ordered by match and a frame mapping `PilotID` to `Username`.
+    """
+    rows = arrays['rows']
+    pilots = arrays['pilots']
+    complete_time = pd.to_datetime(df['CompleteTime'].to_numpy()[rows], format='ISO8601', utc=True)
+
+    history = pd.DataFrame({
+        'PilotID': pilots,
+        'MatchOrdinal': pd.Series(pilots).groupby(pilots).cumcount().to_numpy() + 1,
+        'MatchID': df['MatchID'].to_numpy()[rows],
+        'CompleteTime': complete_time.astype('int64') // 10**9,
+        'Rating': ratings['PilotRating'].to_numpy()[rows],
+        'Sigma': ratings['RatingUncertainty'].to_numpy()[rows],
+        'TeamRating': ratings['TeamRating'].to_numpy()[rows],
+        'OpponentRating': ratings['OpponentRating'].to_numpy()[rows]
+    })
+    pilot_names = pd.DataFrame({'PilotID': np.arange(len(arrays['pilot_names'])), 'Username': arrays['pilot_names']})
+
+    return history, pilot_names
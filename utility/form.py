@@ -0,0 +1,42 @@
+import pandas as pd
+
+from utility.stats import wins, losses, deaths, wlr
+
+FORM_WINDOWS = (10, 25, 50)
+
+# Metrics computed for every window, columns are named like `MS10`
+FORM_METRICS = ['MS', 'DMG', 'WLR', 'Deaths']
+
+def recent_form(df, windows=FORM_WINDOWS):
+    """
+    Averages over the last games of every pilot, computed with grouped rolling sums.
+
+    Args:
+        df (DataFrame): Pilot rows sorted by completion time, the games left by the page filters.
+        windows (tuple): Numbers of last games.
+
+    Returns:
+        DataFrame: `MS{n}`, `DMG{n}`, `WLR{n}` and `Deaths{n}` columns for every window `n`, indexed by pilot name.
+    """
+    values = pd.DataFrame({
+        'Games': 1,
+        'MatchScore': df['MatchScore'],
+        'Damage': df['Damage'],
+        'Wins': wins(df),
+        'Losses': losses(df),
+        'Deaths': deaths(df)
+    }, index=df.index)
+    pilots = df['Username']
+    totals = values.groupby(pilots, sort=False).cumsum()
+
+    result = {}
+    for window in windows:
+        # Rolling sums as differences of running totals, the last one of a pilot covers their last `window` games
+        rolling = totals - totals.groupby(pilots, sort=False).shift(window, fill_value=0)
+        last = rolling.groupby(pilots).last()
+        result[f'MS{window}'] = last['MatchScore'] / last['Games']
+        result[f'DMG{window}'] = last['Damage'] / last['Games']
+        result[f'WLR{window}'] = wlr(last['Wins'], last['Losses'])
+        result[f'Deaths{window}'] = last['Deaths'] / last['Games']
+
+    return pd.DataFrame(result).rename_axis('Username')
@@ -28,6 +28,12 @@ def set_labels_angle(value):
 def get_labels_angle():
     return get_cached_value('chart_labels_angle', 0)
 
+def set_chart_points_budget(value):
+    set_cached_value('chart_points_budget', value)
+
+def get_chart_points_budget():
+    return get_cached_value('chart_points_budget', 1000)
+
 def set_leaderboard_size(value):
     set_cached_value('leaderboard_size', value)
 
@@ -0,0 +1,156 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+from threading import Lock
+
+from utility.database import comp_data, data_version
+from utility.caching import CACHE_TTL
+
+FILTER_COLUMNS = ['Tournament', 'Division', 'TeamName', 'Username', 'Map', 'Class', 'Chassis', 'Mech']
+
+class Filter_Index:
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        """
+        Inverted index of comp data rows used to chain filters without scanning the frame.
+
+        Every value of an indexed column maps to a packed bitset of row positions, bitsets are
+        built on first use and combined with bitwise OR inside a column and AND across columns.
+
+        Args:
+            df (DataFrame): Indexed frame, bitsets refer to its row positions.
+            columns (list): Filterable columns.
+        """
+        self.rows = df.shape[0]
+        self.values = {}
+        self.codes = {}
+        self.bitsets = {}
+        self.lock = Lock()
+
+        for column in columns:
+            if column not in df.columns:
+                continue
+            codes, values = pd.factorize(df[column], sort=True)
+            self.codes[column] = codes.astype(np.int32)
+            self.values[column] = pd.Series(values)
+            self.bitsets[column] = {}
+
+    def __contains__(self, column):
+        return column in self.codes
+
+    def all(self):
+        return np.packbits(np.ones(self.rows, dtype=bool))
+
+    def bitset(self, column, code):
+        bitsets = self.bitsets[column]
+        if code not in bitsets:
+            with self.lock:
+                bitsets[code] = np.packbits(self.codes[column] == code)
+
+        return bitsets[code]
+
+    def mask(self, column, selected):
+        """Bitset of rows where `column` has any of the `selected` values."""
+        selected = selected if isinstance(selected, list) else [selected]
+        codes = self.values[column].index[self.values[column].isin(selected)]
+        if codes.empty:
+            return np.zeros_like(self.all())
+
+        return np.bitwise_or.reduce([self.bitset(column, code) for code in codes])
+
+    def positions(self, bitset):
+        return np.flatnonzero(np.unpackbits(bitset, count=self.rows))
+
+    def options(self, column, bitset=None):
+        """Sorted values of `column` present in the rows of `bitset`, all values if it is None."""
+        if bitset is None:
+            return self.values[column]
+
+        codes = self.codes[column][np.unpackbits(bitset, count=self.rows).view(bool)]
+        present = np.bincount(codes[codes >= 0], minlength=self.values[column].size) > 0
+
+        return self.values[column][present]
+
+@st.cache_resource(ttl=CACHE_TTL)
+def filter_index(version):
+    return Filter_Index(comp_data(version, tuple(FILTER_COLUMNS)))
+
+def comp_data_index():
+    return filter_index(data_version())
+
+class Pilot_Index:
+    def __init__(self, df, special_divisions=('S', 'Swiss')):
+        """
+        Comp data rows and per-division counts of every pilot, keyed by casefolded username.
+
+        Args:
+            df (DataFrame): Comp data with `Tournament`, `Division`, `Username`, `MatchID` and `Win` columns, sorted by completion time.
+            special_divisions (tuple): Divisions left out of the average division estimate.
+        """
+        keys = df['Username'].str.casefold()
+        self.positions = keys.groupby(keys, sort=False).indices
+        self.average_games = keys.value_counts().mean() if keys.size else 0
+
+        divisions = df['Division'].drop_duplicates().sort_values().to_list()
+        self.division_decoding = {i + 1: division for i, division in enumerate(divisions)}
+        self.division_encoding = {division: code for code, division in self.division_decoding.items()}
+
+        rows = pd.DataFrame({
+            'Pilot': keys,
+            'Tournament': df['Tournament'],
+            'Division': df['Division'],
+            'MatchID': df['MatchID'],
+            'Losses': 1 - df['Win'],
+            'Order': np.arange(df.shape[0])
+        })
+
+        # Game and loss counts in the order a pilot first played in every (tournament, division)
+        regular = rows[~rows['Division'].isin(special_divisions)]
+        self.tournament_divisions = regular.groupby(['Pilot', 'Tournament', 'Division'], as_index=False, sort=False).agg(
+            Games=('MatchID', 'count'),
+            Losses=('Losses', 'sum'),
+            Order=('Order', 'min')
+        ).sort_values(['Pilot', 'Order'], ignore_index=True)
+        self.tournament_divisions['Code'] = self.tournament_divisions['Division'].map(self.division_encoding)
+
+        self.division_games = rows.groupby(['Pilot', 'Division'])['MatchID'].nunique()
+        self.games = rows.groupby('Pilot')['MatchID'].nunique()
+
+    def rows(self, pilots):
+        """Row positions of the pilots, names are matched case-insensitively."""
+        positions = [self.positions[pilot.casefold()] for pilot in pilots if pilot.casefold() in self.positions]
+        return np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.intp)
+
+    def divisions(self, pilots):
+        """
+        Estimated average division and confidence of every pilot in one vectorized pass.
+
+        Every (tournament, division) contributes its division code shifted by the loss rate,
+        weighted by its share of games and, for more than two entries, by a 0.8-1.2 recency ramp.
+
+        Returns:
+            DataFrame: `AverageDiv` and `Confidence` indexed by casefolded pilot name.
+        """
+        keys = pd.Index([pilot.casefold() for pilot in pilots]).drop_duplicates()
+        df = self.tournament_divisions[self.tournament_divisions['Pilot'].isin(keys)]
+
+        pilot_groups = df.groupby('Pilot', sort=False)
+        count = pilot_groups['Games'].transform('size')
+        rank = pilot_groups.cumcount()
+        total_games = pilot_groups['Games'].transform('sum')
+
+        ramp = np.where(count > 2, 0.8 + 0.4 * rank / (count - 1).clip(lower=1), 1.0)
+        weight = df['Games'] / total_games * ramp
+        division = (df['Code'] + 2 * (df['Losses'] / df['Games'] - 0.5)) * weight
+
+        result = pd.DataFrame({
+            'AverageDiv': division.groupby(df['Pilot']).sum(),
+            'Confidence': (df.groupby('Pilot')['Games'].sum() / self.average_games).clip(upper=1.0)
+        }).reindex(keys, fill_value=0)
+
+        return result
+
+@st.cache_resource(ttl=CACHE_TTL)
+def pilot_index(version):
+    columns = ('Tournament', 'Division', 'Username', 'MatchID', 'Win')
+    return Pilot_Index(comp_data(version, columns))
@@ -0,0 +1,121 @@
+import requests
+import sqlite3 as sql
+import json
+from time import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+# Jarl's list client, kept apart from `utility.requests` so it does not depend on the app secrets
+
+JARLS_URL = 'https://leaderboard.isengrim.org'
+JARLS_TTL = 6 * 60 * 60
+JARLS_NOT_FOUND_TTL = 60 * 60
+JARLS_WORKERS = 8
+
+class Jarls_Client:
+    def __init__(self, cache_file, base_url=JARLS_URL, ttl=JARLS_TTL, not_found_ttl=JARLS_NOT_FOUND_TTL, workers=JARLS_WORKERS, timeout=10):
+        """
+        Jarl's list client with a pooled session, concurrent lookups and a persistent cache.
+
+        Found pilots are cached for `ttl` seconds and unknown pilots (404) for `not_found_ttl`,
+        other failures are not cached and retried on the next lookup.
+
+        Args:
+            cache_file (str): SQLite file of the cache, kept apart from the comp database so lookups do not change its version.
+            base_url (str): API host, can point to a local stand-in server.
+            ttl (int): Lifetime of found pilots in seconds.
+            not_found_ttl (int): Lifetime of unknown pilots in seconds.
+            workers (int): Concurrent requests and pooled connections.
+            timeout (int): Request timeout in seconds.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jarls')
+
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS JarlsCache (Pilot TEXT PRIMARY KEY, Status INTEGER, Data TEXT, FetchedAt REAL)')
+
+    def _connect(self):
+        return sql.connect(self.cache_file, timeout=30)
+
+    def cached(self, pilot):
+        """Cached `(result, message)` of a pilot or None if it is missing or expired."""
+        with self._connect() as conn:
+            row = conn.execute('SELECT Status, Data, FetchedAt FROM JarlsCache WHERE Pilot = ?', (pilot.casefold(),)).fetchone()
+
+        if not row:
+            return None
+
+        status, data, fetched_at = row
+        ttl = self.ttl if status == 200 else self.not_found_ttl
+        if time() - fetched_at > ttl:
+            return None
+
+        return (json.loads(data), None) if status == 200 else ({}, self.not_found_message(pilot))
+
+    def store(self, pilot, status, data):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO JarlsCache VALUES (?, ?, ?, ?)', (pilot.casefold(), status, json.dumps(data), time()))
+
+    def not_found_message(self, pilot):
+        return f"Pilot {pilot} was not found on Jarl's list."
+
+    def request(self, pilot):
+        """
+        Fetches a pilot from the API, falls back to the last season when the pilot has no current rank.
+
+        Returns:
+            tuple: Pilot stats (empty if not available) and an error message or None.
+        """
+        try:
+            response = self.session.get(f'{self.base_url}/api/usernames/{pilot}', timeout=self.timeout)
+            if response.status_code == 404:
+                self.store(pilot, 404, {})
+                return {}, self.not_found_message(pilot)
+
+            if response.status_code != 200:
+                return {}, f"Error fetching pilot stats for: {pilot}\nCode={response.status_code},Text={response.text}"
+
+            result = response.json()
+            if not result['Rank']:
+                response = self.session.get(f"{self.base_url}/api/usernames/{pilot}/seasons/{result['LastSeason']}", timeout=self.timeout)
+                if response.status_code != 200:
+                    return {}, f"Error fetching pilot's last season details: {pilot}\nCode={response.status_code},Text={response.text}"
+                result = response.json()
+
+            self.store(pilot, 200, result)
+            return result, None
+        except Exception as e:
+            return {}, f"Error fetching pilot stats for: {pilot}\n{e}"
+
+    def pilot_stats(self, pilot):
+        return self.cached(pilot) or self.request(pilot)
+
+    def submit(self, pilot):
+        """Starts a lookup in the background and returns its future."""
+        return self.executor.submit(self.pilot_stats, pilot)
+
+    def stream(self, pilots):
+        """
+        Looks up many pilots concurrently.
+
+        Yields:
+            tuple: `(pilot, result, message)` in completion order, cached pilots come first.
+        """
+        futures = {}
+        for pilot in dict.fromkeys(pilots):
+            cached = self.cached(pilot)
+            if cached:
+                yield pilot, *cached
+            else:
+                futures[self.executor.submit(self.request, pilot)] = pilot
+
+        for future in as_completed(futures):
+            yield futures[future], *future.result()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+def matchup_pairs(matches):
+    """
+    Head-to-head records of every pair of teams that met, aggregated in sparse (COO) form.
+
+    Every match adds an entry at (team 1, team 2) and at (team 2, team 1), entries with the
+    same coordinates are summed with `np.bincount` over the flattened cell numbers, so only
+    pairs that actually played are materialized.
+
+    Args:
+        matches (DataFrame): Match facts with `Team1Name`, `Team2Name` and `WinningTeam`.
+
+    Returns:
+        DataFrame: `Team`, `Opponent`, `Games`, `Wins`, `Losses` and `WinRate`, one row per pair and direction.
+    """
+    matches = matches.dropna(subset=['Team1Name', 'Team2Name'])
+    count = matches.shape[0]
+
+    codes, teams = pd.factorize(pd.concat([matches['Team1Name'], matches['Team2Name']], ignore_index=True), sort=True)
+    codes = codes.astype(np.int64)
+    team1, team2 = codes[:count], codes[count:]
+    team1_wins = (matches['WinningTeam'] == '1').to_numpy()
+    team2_wins = (matches['WinningTeam'] == '2').to_numpy()
+
+    rows = np.concatenate([team1, team2])
+    columns = np.concatenate([team2, team1])
+    wins = np.concatenate([team1_wins, team2_wins])
+
+    cells, positions = np.unique(rows * teams.size + columns, return_inverse=True)
+    games = np.bincount(positions, minlength=cells.size)
+    won = np.bincount(positions, weights=wins, minlength=cells.size).astype(np.int64)
+
+    teams = teams.to_numpy()
+    return pd.DataFrame({
+        'Team': teams[cells // max(teams.size, 1)],
+        'Opponent': teams[cells % max(teams.size, 1)],
+        'Games': games,
+        'Wins': won,
+        'Losses': games - won,
+        'WinRate': won / np.maximum(games, 1)
+    })
+
+def matchup_teams(pairs, teams=None, count=25):
+    """
+    Rows and columns of the displayed matrix.
+
+    Selected `teams` are the rows and their opponents the columns, otherwise
+    both axes are the `count` teams with the most games.
+    """
+    if teams:
+        opponents = pairs[pairs['Team'].isin(teams)].groupby('Opponent')['Games'].sum()
+        return list(teams), opponents.sort_values(ascending=False).head(count).index.to_list()
+
+    games = pairs.groupby('Team')['Games'].sum().sort_values(ascending=False).head(count)
+    return games.index.to_list(), games.index.to_list()
+
+def head_to_head_matches(matches, team, opponent):
+    """Matches between two teams, newest first, with the result from the perspective of `team`."""
+    team1 = (matches['Team1Name'] == team) & (matches['Team2Name'] == opponent)
+    team2 = (matches['Team1Name'] == opponent) & (matches['Team2Name'] == team)
+    matches = matches[team1 | team2]
+    team1 = team1[matches.index]
+
+    won = np.where(team1, matches['WinningTeam'] == '1', matches['WinningTeam'] == '2')
+    return pd.DataFrame({
+        'MatchID': matches['MatchID'].astype(str),
+        'Time': pd.to_datetime(matches['MatchTime'], unit='s'),
+        'Tournament': matches['Tournament'],
+        'Division': matches['Division'],
+        'Map': matches['Map'],
+        'Side': np.where(team1, '1', '2'),
+        'Result': np.where(won, 'WIN', 'LOSS'),
+        'Score': np.where(team1, matches['Team1Score'].astype(str) + ' : ' + matches['Team2Score'].astype(str), matches['Team2Score'].astype(str) + ' : ' + matches['Team1Score'].astype(str))
+    }).iloc[::-1]
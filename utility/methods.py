@@ -1,4 +1,5 @@
 import streamlit as st
+import numpy as np
 
 import re
 
@@ -25,6 +26,31 @@ def parse_match_ids(submitted_text):
     items = re.findall(pattern, submitted_text)
     return list(dict.fromkeys(items))
 
+def downsample_lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling, returns positions of the points to keep."""
+    size = len(x)
+    if threshold <= 2 or size <= threshold:
+        return np.arange(size)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.intp)
+
+    selected = np.zeros(threshold, dtype=np.intp)
+    selected[-1] = size - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < threshold - 1 else size
+        average_x = x[stop:next_stop].mean()
+        average_y = y[stop:next_stop].mean()
+
+        areas = np.abs((x[previous] - average_x) * (y[start:stop] - y[previous]) - (x[previous] - x[start:stop]) * (average_y - y[previous]))
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+
+    return selected
+
 # General pandas dataframe operations
 
 def nunique(df, column):
@@ -51,3 +77,14 @@ def filter_dataframe(df, key, value):
         result = result[result[key] == value]
 
     return result
+
+def filters_key(options):
+    """Hashable representation of the selected filter values, used as a part of cache keys."""
+    return tuple(sorted((key, tuple(sorted(value)) if isinstance(value, list) else value) for key, value in options.items() if value))
+
+def apply_filters(df, key):
+    """Filters `df` by the values stored in `filters_key()` output."""
+    for column, value in key:
+        df = filter_dataframe(df, column, list(value) if isinstance(value, tuple) else value)
+
+    return df
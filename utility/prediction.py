@@ -0,0 +1,122 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import math
+
+from threading import Lock
+from cachetools import LRUCache
+
+from utility.database import comp_data, table_columns
+from utility.caching import CACHE_TTL
+
+ERF = np.frompyfunc(math.erf, 1, 1)
+
+def normal_cdf(values):
+    return 0.5 * (1 + ERF(np.asarray(values, dtype=np.float64) / math.sqrt(2)).astype(np.float64))
+
+class Win_Predictor:
+    def __init__(self, pilots, mu, sigma, model, cache_size=4096):
+        """
+        Answers Plackett-Luce win probabilities for pairs of lineups.
+
+        Args:
+            pilots (list): Pilot names, matched case-insensitively.
+            mu (array): Latest mean rating of every pilot.
+            sigma (array): Latest rating uncertainty of every pilot.
+            model (PlackettLuce): Model that produced the ratings, provides defaults for unrated pilots and beta.
+            cache_size (int): Number of lineup pairs kept in the LRU cache.
+        """
+        self.pilots = {pilot.lower(): index for index, pilot in enumerate(pilots)}
+        self.mu = np.append(np.asarray(mu, dtype=np.float64), model.mu)
+        self.sigma_squared = np.append(np.asarray(sigma, dtype=np.float64) ** 2, model.sigma ** 2)
+        self.beta_squared = model.beta ** 2
+
+        self.cache = LRUCache(maxsize=cache_size)
+        self.lock = Lock()
+
+    def rated(self, pilot):
+        return pilot.lower() in self.pilots
+
+    def strongest_lineup(self, pilots, size=12):
+        """Picks `size` pilots with the highest conservative rating (mu - 3 * sigma)."""
+        codes, _ = self._encode([pilots])
+        ordinals = self.mu[codes] - 3 * np.sqrt(self.sigma_squared[codes])
+        order = np.argsort(-ordinals, kind='stable')[:size]
+
+        return [pilots[position] for position in order]
+
+    def _encode(self, lineups):
+        unrated = len(self.pilots)
+        codes = [self.pilots.get(pilot.lower(), unrated) for lineup in lineups for pilot in lineup]
+        teams = np.repeat(np.arange(len(lineups)), [len(lineup) for lineup in lineups])
+
+        return np.asarray(codes, dtype=np.intp), teams
+
+    def team_ratings(self, lineups):
+        """Returns summed mean and variance of every lineup."""
+        codes, teams = self._encode(lineups)
+        mu = np.bincount(teams, weights=self.mu[codes], minlength=len(lineups))
+        sigma_squared = np.bincount(teams, weights=self.sigma_squared[codes], minlength=len(lineups))
+
+        return mu, sigma_squared
+
+    def _probabilities(self, mu1, sigma1, mu2, sigma2):
+        return normal_cdf((mu1 - mu2) / np.sqrt(2 * self.beta_squared + sigma1 + sigma2))
+
+    def predict(self, pairs):
+        """
+        Predicts results of many matches in one batch.
+
+        Args:
+            pairs (list): `(lineup1, lineup2)` tuples, each lineup is a list of pilot names.
+
+        Returns:
+            array: Probability of the first lineup winning for every pair.
+        """
+        keys = [(tuple(sorted(pilot.lower() for pilot in lineup1)), tuple(sorted(pilot.lower() for pilot in lineup2))) for lineup1, lineup2 in pairs]
+        result = np.empty(len(keys), dtype=np.float64)
+
+        with self.lock:
+            missing = []
+            for position, key in enumerate(keys):
+                value = self.cache.get(key)
+                if value is None:
+                    missing.append(position)
+                else:
+                    result[position] = value
+
+        if missing:
+            lineups = [lineup for position in missing for lineup in keys[position]]
+            mu, sigma_squared = self.team_ratings(lineups)
+            probabilities = self._probabilities(mu[0::2], sigma_squared[0::2], mu[1::2], sigma_squared[1::2])
+            result[missing] = probabilities
+
+            with self.lock:
+                for position, probability in zip(missing, probabilities):
+                    self.cache[keys[position]] = float(probability)
+
+        return result
+
+    def predict_match(self, lineup1, lineup2):
+        return float(self.predict([(lineup1, lineup2)])[0])
+
+    def pairwise(self, lineups):
+        """Returns a matrix with the probability of lineup `i` beating lineup `j`."""
+        mu, sigma_squared = self.team_ratings(lineups)
+        return self._probabilities(mu[:, None], sigma_squared[:, None], mu[None, :], sigma_squared[None, :])
+
+RATING_COLUMNS = ('Username', 'RatingBase', 'RatingUncertainty')
+
+@st.cache_resource(ttl=CACHE_TTL)
+def win_predictor(version):
+    """Predictor with the latest ratings of every pilot, rebuilt for every data version (new matches or a rating run)."""
+    from utility.rating import MWO_Rating_System
+
+    if set(RATING_COLUMNS) <= set(table_columns('CompData')):
+        df = comp_data(version, RATING_COLUMNS)
+    else:
+        df = pd.DataFrame([], columns=RATING_COLUMNS)
+
+    latest = df.dropna(subset=['RatingBase', 'RatingUncertainty']).groupby('Username')[['RatingBase', 'RatingUncertainty']].last()
+
+    return Win_Predictor(latest.index.tolist(), latest['RatingBase'], latest['RatingUncertainty'], MWO_Rating_System().model)
@@ -1,5 +1,6 @@
 from openskill.models import PlackettLuce
 from utility.globals import RATING_BASE
+from utility.baseline import Chassis_Baseline
 
 class MWO_Rating_System:
     def __init__(self, mu=25.0, sigma=25.0/3, beta=25.0/60, tau=25.0/3000):
@@ -16,9 +17,9 @@ class MWO_Rating_System:
         self.model.weight_bounds = None
 
         self.player_ratings = {}
-        self.chassis_stats = {None: {}}
         self.historic_stats_threshold = 10
         self.performance_indicators = ['MatchScore', 'Kills', 'KillsMostDamage', 'Assists', 'ComponentsDestroyed', 'Damage']
+        self.baseline = Chassis_Baseline(self.performance_indicators, self.historic_stats_threshold)
 
         self.processed_matches = 0
         self.correct_predictions = 0
@@ -34,58 +35,6 @@ class MWO_Rating_System:
             self.player_ratings[player_name] = self._get_default_rating(player_name)
         return self.player_ratings[player_name]
     
-    def _update_chassis_stats(self, chassis, stats, division = None):
-        def update(data, stats, chassis):
-            if chassis in data:
-                historic_stats = data[chassis]
-                uses = historic_stats['Uses']
-                for indicator in self.performance_indicators:
-                    historic_stats[indicator] = (stats[indicator] + historic_stats[indicator] * uses) / (uses + 1)
-                historic_stats['Uses'] += 1
-            else:
-                data[chassis] = {indicator: stats[indicator] for indicator in self.performance_indicators}
-                data[chassis]['Uses'] = 1
-
-        if division not in self.chassis_stats:
-            self.chassis_stats[division] = {}
-
-        division_data = self.chassis_stats[division]
-        update(division_data, stats, chassis)
-
-        if division is not None:
-            general_data = self.chassis_stats[None]
-            update(general_data, stats, chassis)
-
-    def _performance_index(self, data):
-        """Normalizes player stats based on the historical average for their mech."""
-
-        def normalized_division(dividend, divisor):
-            if divisor == 0:
-                return 1
-            
-            floor = 0.75
-            ceiling = 1.25
-            result = dividend / divisor
-            return floor if result < floor else ceiling if result > ceiling else result
-
-        def valid_stats(chassis, division):
-            if division not in self.chassis_stats:
-                self.chassis_stats[division] = {}
-            division_data = self.chassis_stats[division]
-
-            return chassis in division_data and division_data[chassis]['Uses'] >= self.historic_stats_threshold
-
-        chassis = data['Chassis']
-        division = data['Division']
-        if not valid_stats(chassis, division):
-            self._update_chassis_stats(chassis, data, division)
-            return 1
-        
-        division_data = self.chassis_stats[division]
-        stats = division_data[chassis]
-        normalized_stats = [normalized_division(data[indicator], stats[indicator]) for indicator in self.performance_indicators]
-        return sum(normalized_stats) / len(self.performance_indicators)
-    
     def make_predictions(self, teams, ranks):
         self.processed_matches += 1
         if self.processed_matches < 1000:
@@ -124,13 +73,10 @@ class MWO_Rating_System:
                 teams_data[team_id] = {'players': [], 'performance': []}
 
             team = teams_data[team_id]
-            for index, row in side.iterrows():
-                player = row['Username']
-                rating = self._get_player_rating(player_name=player)
-                performance = self._performance_index(row)
-
-                team['players'].append(rating)
-                team['performance'].append(performance)
+            performance = self.baseline.performance(side['Division'].to_numpy(), side['Chassis'].to_numpy(), side[self.performance_indicators].to_numpy())
+            for index, player, weight in zip(side.index, side['Username'], performance):
+                team['players'].append(self._get_player_rating(player_name=player))
+                team['performance'].append(float(weight))
                 indexes[player] = index
 
         team_ids = teams_data.keys()
@@ -175,10 +121,9 @@ class MWO_Rating_System:
             'confidence_interval': (rating.mu - 2 * rating.sigma, rating.mu + 2 * rating.sigma)
         }
 
-    def populate_chassis_stats(self, historical_match_data):
+    def populate_chassis_stats(self, baseline):
         """
-        Calculates and stores average stats per mech chassis from historical data.
-        You would call this method with a large dataset of past matches.
+        Replaces running chassis stats with a precomputed baseline.
+        Use `Chassis_Baseline.from_history()` or `Chassis_Baseline.load()` to reuse a baseline across runs.
         """
-        # columns = ['Chassis', 'MatchScore', 'Kills', 'KillsMostDamage', 'Assists', 'ComponentsDestroyed', 'Damage', 'Uses']
-        self.chassis_stats = historical_match_data
\ No newline at end of file
+        self.baseline = baseline
\ No newline at end of file
@@ -1,12 +1,19 @@
 import requests
 import pandas as pd
-from time import sleep
-from streamlit import cache_data
+from os import path
+from time import sleep, monotonic
+from threading import Lock
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from streamlit import cache_resource
 
 from utility.datasources import mech_data, roster_links, team_rosters
-from utility.database import unique_match_ids, write_comp_data
+from utility.database import unique_match_ids, write_comp_data, read_archived_match, archive_match
+from utility.cube import build_cube
+from utility.jarls import Jarls_Client
 from utility.methods import error, convert_to_int
-from utility.globals import API_URL, API_KEY
+from utility.globals import API_URL, API_KEY, DB_NAME
 
 #---------------------------------------------------------------------
 # MWO API
@@ -104,18 +111,96 @@ def match_data(id, match_details, user_details, tournament):
     
     return lines
 
-def fetch_api_data(match_id):
-    result = None
+API_CALLS = 60
+API_PERIOD = 60
+API_WORKERS = 4
+
+class Rate_Limiter:
+    def __init__(self, calls, period, interval=0):
+        """
+        Sliding window rate limiter shared between threads.
+
+        Args:
+            calls (int): Allowed calls within any window of `period` seconds.
+            period (float): Window length in seconds.
+            interval (float): Minimum time between two calls in seconds, spreads the calls over the window instead of a burst.
+        """
+        self.calls = calls
+        self.period = period
+        self.interval = interval
+        self.times = deque()
+        self.lock = Lock()
+
+    def acquire(self):
+        """Blocks until a call is allowed and records it."""
+        while True:
+            with self.lock:
+                now = monotonic()
+                while self.times and now - self.times[0] >= self.period:
+                    self.times.popleft()
+
+                spaced = not self.times or now - self.times[-1] >= self.interval
+                if len(self.times) < self.calls and spaced:
+                    self.times.append(now)
+                    return
+
+                if len(self.times) < self.calls:
+                    delay = self.interval - (now - self.times[-1])
+                else:
+                    delay = self.period - (now - self.times[0])
+            sleep(delay)
+
+# Calls start at most once per second like the former sequential fetching, workers overlap the response times
+API_LIMITER = Rate_Limiter(API_CALLS, API_PERIOD, API_PERIOD / API_CALLS)
+API_SESSION = requests.Session()
+API_SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=API_WORKERS))
+
+def fetch_match(match_id):
+    """
+    API response of a match, served from the archive when it was fetched before.
+
+    Safe to call from worker threads: errors are returned instead of displayed.
+
+    Returns:
+        tuple: Response JSON or None and an error message or None.
+    """
+    key = str(match_id).replace(',', '').strip()
+    archived = read_archived_match(key) if key.isdigit() else None
+    if archived:
+        return archived, None
+
+    API_LIMITER.acquire()
+    try:
+        url = API_URL.replace('%1', match_id).replace('%2', API_KEY)
+        response = API_SESSION.get(url, timeout=30)
+        if response.status_code != 200:
+            return None, f"Error fetching id={match_id}:\nCode={response.status_code},Text={response.text}"
 
-    url = API_URL.replace('%1', match_id).replace('%2', API_KEY)
-    response = requests.get(url)
-    if response.status_code == 200:
         result = response.json()
-    else:
-        error(f"Error fetching id={match_id}:\nCode={response.status_code},Text={response.text}")
+        if key.isdigit() and 'MatchDetails' in result:
+            archive_match(key, result)
+
+        return result, None
+    except Exception as e:
+        return None, f"Error fetching id={match_id}:\n{e}"
+
+def fetch_api_data(match_id):
+    result, message = fetch_match(match_id)
+    if message:
+        error(message)
 
     return result
 
+def fetch_matches(match_ids, workers=API_WORKERS):
+    """
+    Fetches many matches concurrently within the API rate limit.
+
+    Returns:
+        dict: Match ID to a `(response, message)` tuple, in the order of `match_ids`.
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api') as executor:
+        return dict(zip(match_ids, executor.map(fetch_match, match_ids)))
+
 def request_match_data(match_id, tournament):
     df = None
 
@@ -142,6 +227,7 @@ def batch_request(match_ids, tournament):
     match_ids = list(dict.fromkeys(match_ids))
 
     unique_ids = unique_match_ids()
+    added = False
 
     for match_id in match_ids:
         id = convert_to_int(match_id)
@@ -149,12 +235,16 @@ def batch_request(match_ids, tournament):
             continue
 
         df = request_match_data(match_id, tournament)
-        write_comp_data(df)
-
         unique_ids.append(id)
+        if df.empty:
+            continue
+
+        write_comp_data(df)
+        added = True
 
-        # API calls limited by 60 per minute
-        sleep(1)
+    # Aggregates are rebuilt once per batch instead of on the next page view
+    if added:
+        build_cube()
 
 def mech_list():
     url = "https://static.mwomercs.com/api/mechs/list/dict.json"
@@ -172,30 +262,18 @@ def mech_list():
 # JARL'S LIST API
 #---------------------------------------------------------------------
 
+JARLS_CACHE = f'{path.splitext(DB_NAME)[0]}.jarls.sqlite3'
+
 def jarls_pilot_overview_link(pilot):
     return f"https://leaderboard.isengrim.org/search?u={pilot.replace(' ', '+')}"
 
-@cache_data(ttl=300)
+@cache_resource
+def jarls_client():
+    return Jarls_Client(JARLS_CACHE)
+
 def jarls_pilot_stats(pilot):
-    url = f'https://leaderboard.isengrim.org/api/usernames/{pilot}'
-    result = {}
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            result = response.json()
-            if not result['Rank']:
-                last_season_url = f"https://leaderboard.isengrim.org/api/usernames/{pilot}/seasons/{result['LastSeason']}"
-                response = requests.get(last_season_url)
-                if response.status_code == 200:
-                    result = response.json()
-                else:
-                    error(f"Error fetching pilot's last season details: {pilot}\nCode={response.status_code},Text={response.text}") 
-        else:
-            if response.status_code == 404:
-                error(f"Pilot {pilot} was not found on Jarl's list.")
-            else:
-                error(f"Error fetching pilot stats for: {pilot}\nCode={response.status_code},Text={response.text}")
-    except Exception as e:
-        error(f"Error fetching pilot stats for: {pilot}\n{e}")
+    result, message = jarls_client().pilot_stats(pilot)
+    if message:
+        error(message)
 
     return result
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+
+ROUND_ROBIN = 'Round robin'
+SINGLE_ELIMINATION = 'Single elimination'
+CHUNK_SIZE = 25000
+
+def team_lineups(rosters, division=None):
+    """Groups roster pilots by team, `rosters` has the format returned by `team_rosters()`."""
+    lineups = {}
+    for pilot, data in rosters.items():
+        if division and str(data['Division']) != str(division):
+            continue
+        lineups.setdefault(data['Team'].strip(), []).append(pilot)
+
+    return lineups
+
+def seeding_order(size):
+    """Standard bracket order of seeds: the 1st seed meets the last one, top seeds meet as late as possible."""
+    order = [0]
+    while len(order) < size:
+        count = 2 * len(order)
+        order = [seed for top in order for seed in (top, count - 1 - top)]
+
+    return np.array(order)
+
+def bracket_stages(size):
+    rounds = int(np.log2(size))
+    labels = ['Winner', 'Runner-up']
+    for stage in range(2, rounds + 1):
+        labels.append(f'Top {2 ** stage}')
+
+    return labels[:rounds + 1]
+
+def simulate_round_robin(probabilities, simulations, rng):
+    """
+    Plays every pair of teams once per simulation.
+
+    Returns:
+        array: (teams x places) counts of final placements, ties are broken randomly.
+    """
+    teams = probabilities.shape[0]
+    first, second = np.triu_indices(teams, k=1)
+
+    first_team = np.zeros((first.size, teams))
+    first_team[np.arange(first.size), first] = 1
+    second_team = np.zeros((first.size, teams))
+    second_team[np.arange(first.size), second] = 1
+
+    first_wins = (rng.random((simulations, first.size)) < probabilities[first, second]).astype(np.float64)
+    points = first_wins @ first_team + (1 - first_wins) @ second_team
+
+    # Random tie breaks, points are whole numbers so noise below 1 never changes the order otherwise
+    points += rng.random(points.shape) * 0.5
+    standings = np.argsort(-points, axis=1)
+
+    placements = np.column_stack([np.bincount(standings[:, place], minlength=teams) for place in range(teams)])
+
+    return placements
+
+def simulate_single_elimination(probabilities, simulations, rng):
+    """
+    Plays a seeded single elimination bracket, teams are seeded in the order of `probabilities` rows.
+
+    Returns:
+        array: (teams x stages) counts of the last stage reached, see `bracket_stages()`.
+    """
+    teams = probabilities.shape[0]
+    size = 1 << max(1, int(np.ceil(np.log2(teams))))
+    rounds = int(np.log2(size))
+
+    # Byes are represented by an extra team that loses every game
+    padded = np.zeros((teams + 1, teams + 1), dtype=np.float64)
+    padded[:teams, :teams] = probabilities
+    padded[:teams, teams] = 1.0
+
+    seeds = seeding_order(size)
+    bracket = np.where(seeds < teams, seeds, teams)
+    current = np.broadcast_to(bracket, (simulations, size))
+
+    stages = np.zeros((teams + 1, rounds + 1), dtype=np.int64)
+    for round_number in range(rounds):
+        first = current[:, 0::2]
+        second = current[:, 1::2]
+        first_wins = rng.random(first.shape) < padded[first, second]
+
+        winners = np.where(first_wins, first, second)
+        losers = np.where(first_wins, second, first)
+        np.add.at(stages[:, rounds - round_number], losers.ravel(), 1)
+        current = winners
+
+    np.add.at(stages[:, 0], current.ravel(), 1)
+
+    return stages[:teams]
+
+def simulate_chunk(probabilities, structure, simulations, seed):
+    rng = np.random.default_rng(seed)
+    if structure == SINGLE_ELIMINATION:
+        return simulate_single_elimination(probabilities, simulations, rng)
+    else:
+        return simulate_round_robin(probabilities, simulations, rng)
+
+def simulate_tournament(teams, probabilities, structure=ROUND_ROBIN, simulations=100000, processes=None, seed=None):
+    """
+    Runs Monte Carlo simulations of a tournament in parallel processes.
+
+    Args:
+        teams (list): Team names, for elimination brackets in seeding order.
+        probabilities (array): Matrix with the probability of team `i` beating team `j`.
+        structure (str): `ROUND_ROBIN` or `SINGLE_ELIMINATION`.
+        simulations (int): Number of simulated tournaments.
+        processes (int): Worker processes, defaults to the number of CPUs.
+        seed (int): Seed for reproducible results.
+
+    Returns:
+        DataFrame: Placement probabilities of every team.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    chunks = [min(CHUNK_SIZE, simulations - start) for start in range(0, simulations, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    workers = min(len(chunks), processes or cpu_count() or 1)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(simulate_chunk, [probabilities] * len(chunks), [structure] * len(chunks), chunks, seeds)
+            counts = sum(results)
+    else:
+        counts = sum(simulate_chunk(probabilities, structure, chunk, chunk_seed) for chunk, chunk_seed in zip(chunks, seeds))
+
+    if structure == SINGLE_ELIMINATION:
+        columns = bracket_stages(1 << (counts.shape[1] - 1))
+    else:
+        columns = [f'#{place + 1}' for place in range(len(teams))]
+
+    return pd.DataFrame(counts / simulations, index=pd.Index(teams, name='Team'), columns=columns)
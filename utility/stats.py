@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized versions of the statistics shared by the pages. Every ratio is computed
+# from grouped sums and counts of boolean/integer columns, no Python code runs per group.
+
+AWLR_SCALE = 1/200
+
+def safe_ratio(dividend, divisor):
+    """Element-wise `safe_division`: returns the dividend where the divisor is zero."""
+    dividend = pd.Series(dividend, dtype=np.float64) if not isinstance(dividend, pd.Series) else dividend.astype(np.float64)
+    divisor = np.asarray(divisor, dtype=np.float64)
+    return dividend.where(divisor == 0, dividend / np.where(divisor == 0, 1, divisor))
+
+def wlr(wins, losses):
+    return safe_ratio(wins, losses)
+
+def kdr(kills, deaths):
+    return safe_ratio(kills, deaths)
+
+def awlr(wlr, games):
+    """Adjusted WLR, gives slight advantage to those who played more games with the same WLR."""
+    return wlr * (1 + games * AWLR_SCALE)
+
+def survival_rate(games, deaths):
+    return safe_ratio(games - deaths, games)
+
+def wins(df):
+    return df['Win'] if 'Win' in df.columns else df['MatchResult'].eq('WIN').astype(int)
+
+def losses(df):
+    return 1 - df['Win'] if 'Win' in df.columns else df['MatchResult'].eq('LOSS').astype(int)
+
+def deaths(df):
+    return df['Death'] if 'Death' in df.columns else df['HealthPercentage'].eq(0).astype(int)
+
+FLAGS = {'Wins': wins, 'Losses': losses, 'Deaths': deaths}
+
+def indicators(df, columns=(), flags=FLAGS):
+    """Narrow frame with `columns` and integer flags (`Wins`, `Losses`, `Deaths`) of every row."""
+    data = {column: df[column] for column in columns}
+    for flag in flags:
+        data[flag] = FLAGS[flag](df)
+
+    return pd.DataFrame(data, index=df.index)
+
+def group_stats(df, keys, sort=True, **aggregations):
+    """
+    Aggregates pilot rows with built-in groupby reductions.
+
+    Aggregations use `groupby().agg()` named syntax and may refer to `Wins`, `Losses` and `Deaths` flags.
+    `Wins`, `Losses` and `WLR` columns are always added to the result.
+
+    Args:
+        df (DataFrame): Pilot rows.
+        keys (str | list): Columns to group by.
+        sort (bool): Sort groups by keys.
+        aggregations: `Name=(column, function)` pairs, function should be a built-in like 'mean' or 'sum'.
+
+    Returns:
+        DataFrame: One row per group with keys as columns.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    aggregations.setdefault('Wins', ('Wins', 'sum'))
+    aggregations.setdefault('Losses', ('Losses', 'sum'))
+
+    sources = [column for column, _ in aggregations.values()]
+    columns = list(dict.fromkeys(keys + [column for column in sources if column not in FLAGS]))
+    flags = [flag for flag in FLAGS if flag in sources]
+
+    result = indicators(df, columns, flags).groupby(keys, as_index=False, sort=sort).agg(**aggregations)
+    result['WLR'] = wlr(result['Wins'], result['Losses'])
+
+    return result
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+MIN_DUO_GAMES = 5
+
+def duo_pairs(df, by=None, pilots=None):
+    """
+    Games and wins of every pilot pair that dropped in the same lineup.
+
+    Pilots are joined with their lineup (match and side), so the pairs are the nonzero cells of
+    the pilot co-occurrence matrix; cells are numbered and summed with `np.bincount` like a COO
+    matrix product, with winning lineups as weights for the wins. The join holds one row per
+    pilot and lineup mate, so it grows with the lineup size, not with the number of pilots.
+
+    Args:
+        df (DataFrame): Pilot rows with `MatchID`, `Team`, `Username` and `Win` columns.
+        by (str): Optional lineup-level column (e.g. `TeamName`) pairs are kept apart by.
+        pilots (list): Only pairs with any of these pilots, only their lineups are joined.
+
+    Returns:
+        DataFrame: `Pilot1`, `Pilot2` (sorted names), `Games`, `Wins`, `WinRate` and `Synergy`,
+            the duo win rate above the average win rate of both pilots.
+    """
+    pilot_codes, names = pd.factorize(df['Username'], sort=True)
+    lineups, _ = pd.factorize(pd.MultiIndex.from_arrays([df['MatchID'], df['Team']]))
+    group_codes, groups = pd.factorize(df[by] if by else pd.Series(0, index=df.index))
+
+    rows = pd.DataFrame({
+        'Lineup': lineups,
+        'Group': group_codes,
+        'Pilot': pilot_codes.astype(np.int64),
+        'Win': df['Win'].to_numpy()
+    })
+    if pilots is None:
+        pairs = rows.merge(rows[['Lineup', 'Pilot']], on='Lineup', suffixes=('1', '2'))
+        pairs = pairs[pairs['Pilot1'] < pairs['Pilot2']]
+    else:
+        # Selected pilots joined with their lineup mates, pairs of two selected pilots are found from both sides
+        selected = rows[rows['Pilot'].isin(np.flatnonzero(names.isin(pilots)))]
+        mates = rows.loc[rows['Lineup'].isin(selected['Lineup']), ['Lineup', 'Pilot']]
+        pairs = selected.merge(mates, on='Lineup', suffixes=('1', '2'))
+        pairs = pairs[pairs['Pilot1'] != pairs['Pilot2']]
+        pairs = pairs.assign(
+            Pilot1=np.minimum(pairs['Pilot1'], pairs['Pilot2']),
+            Pilot2=np.maximum(pairs['Pilot1'], pairs['Pilot2'])
+        ).drop_duplicates(subset=['Lineup', 'Pilot1', 'Pilot2'])
+
+    size = names.size
+    cells, positions = np.unique((pairs['Group'] * size + pairs['Pilot1']) * size + pairs['Pilot2'], return_inverse=True)
+    games = np.bincount(positions, minlength=cells.size)
+    wins = np.bincount(positions, weights=pairs['Win'], minlength=cells.size).astype(np.int64)
+
+    pilot1 = (cells // size) % size
+    pilot2 = cells % size
+    pilot_rates = np.bincount(rows['Pilot'], weights=rows['Win'], minlength=size) / np.maximum(np.bincount(rows['Pilot'], minlength=size), 1)
+
+    result = pd.DataFrame({
+        'Pilot1': names.to_numpy()[pilot1],
+        'Pilot2': names.to_numpy()[pilot2],
+        'Games': games,
+        'Wins': wins,
+        'WinRate': wins / np.maximum(games, 1),
+        'Synergy': wins / np.maximum(games, 1) - (pilot_rates[pilot1] + pilot_rates[pilot2]) / 2
+    })
+    if by:
+        result.insert(0, by, groups.to_numpy()[cells // (size * size)])
+
+    return result
+
+def top_duos(pairs, min_games=MIN_DUO_GAMES, count=10, pilot=None):
+    """Best duos with at least `min_games` together, optionally only those with `pilot`."""
+    if pilot:
+        pairs = pairs[(pairs['Pilot1'] == pilot) | (pairs['Pilot2'] == pilot)]
+        partner = pairs['Pilot2'].where(pairs['Pilot1'] == pilot, pairs['Pilot1'])
+        pairs = pairs.assign(Pilot1=pilot, Pilot2=partner)
+
+    pairs = pairs[pairs['Games'] >= min_games]
+    return pairs.sort_values(['WinRate', 'Games'], ascending=[False, False]).head(count)
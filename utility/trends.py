@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from utility.database import WEEK
+
+TREND_WINDOW = 4
+TREND_WEEKS = 52
+
+def trend_weeks(weekly, count=TREND_WEEKS, window=TREND_WINDOW):
+    """Last `count` weeks of the data preceded by the weeks needed to fill the first rolling window."""
+    if weekly.empty:
+        return []
+
+    last = int(weekly['Week'].max())
+    return list(range(last - (count + window - 2) * WEEK, last + WEEK, WEEK))
+
+def weekly_matrix(weekly, key, column, weeks):
+    """Sums `column` per `key` value (rows) and week (columns), weeks without data are zero."""
+    return weekly.pivot_table(index=key, columns='Week', values=column, aggfunc='sum', fill_value=0).reindex(columns=weeks, fill_value=0)
+
+def sparkline(df):
+    """Rows of a (key x week) frame as lists, missing values become None so the lines are broken there."""
+    values = df.astype(object).where(df.notna(), None)
+    return pd.Series(values.to_numpy().tolist(), index=df.index)
+
+def rolling_trends(weekly, key, count, wins, share=True, window=TREND_WINDOW, weeks=TREND_WEEKS):
+    """
+    Rolling usage and win rate of every `key` value over the last weeks, from weekly pre-binned counts.
+
+    Args:
+        weekly (DataFrame): Weekly counts with a `Week` column, see `WEEKLY_TABLES`.
+        key (str): Column the trends are computed for, e.g. `Mech` or `Map`.
+        count (str): Usage column, e.g. `Uses` or `Games`.
+        wins (str): Wins column.
+        share (bool): Usage as a share of all usage in the window instead of a count.
+        window (int): Rolling window in weeks.
+        weeks (int): Number of weeks in a trend.
+
+    Returns:
+        DataFrame: `UsageTrend` and `WinRateTrend` lists indexed by `key`.
+    """
+    columns = trend_weeks(weekly, weeks, window)
+    if not columns:
+        return pd.DataFrame({'UsageTrend': pd.Series(dtype=object), 'WinRateTrend': pd.Series(dtype=object)})
+
+    counts = weekly_matrix(weekly, key, count, columns).T.rolling(window, min_periods=1).sum().T
+    won = weekly_matrix(weekly, key, wins, columns).T.rolling(window, min_periods=1).sum().T
+
+    usage = counts / counts.sum(axis=0).replace(0, np.nan) if share else counts
+    win_rate = won / counts.replace(0, np.nan)
+
+    return pd.DataFrame({
+        'UsageTrend': sparkline(usage.iloc[:, -weeks:].fillna(0)),
+        'WinRateTrend': sparkline(win_rate.iloc[:, -weeks:])
+    })
@@ -17,4 +17,10 @@ if st.button('Compare rosters >'):
 if st.button('Calculate ELO >'):
     st.switch_page('views/calculate_elo.py')
 
+if st.button('Rating report >'):
+    st.switch_page('views/rating_report.py')
+
+if st.button('Tournament odds >'):
+    st.switch_page('views/tournament_odds.py')
+
 # Intentional backup page
@@ -6,14 +6,17 @@ import sqlite3 as sql
 
 from utility.requests import jarls_pilot_stats
 from utility.methods import filter_dataframe, nunique, safe_division, unique, error
-from utility.database import read_comp_data
+from utility.database import read_comp_data, write_rating_history, write_match_predictions
 from utility.blocks import metrics_block
+from utility.elo import ELO_Rating_System, match_arrays, rating_pass, rating_history, RATING_BASE, K_FACTOR
+from utility.baseline import Chassis_Baseline
+from utility.calibration import match_predictions
 
 from utility.globals import DB_NAME
+from os import path
 
 COMP_DATA = read_comp_data()
-RATING_BASE = 400
-K_FACTOR = 32
+BASELINE_FILE = f'{path.splitext(DB_NAME)[0]}.baseline.npz'
 
 def k_factor(rating1, rating2, result):
     return K_FACTOR
@@ -21,54 +24,22 @@ def k_factor(rating1, rating2, result):
 def rating_base(rating1, rating2, result):
     return RATING_BASE
 
-def elo_rating_change(rating1, rating2, side1_result):
-    if side1_result == 'WIN':
-        rating_difference = rating2 - rating1
-        sign = 1
-    else:
-        rating_difference = rating1 - rating2
-        sign = -1
+def progress_callback(container):
+    def callback(processed_games):
+        if processed_games % 100 == 0:
+            container.write(f"Processed games: {processed_games}")
 
-    exponent = rating_difference / rating_base(rating1, rating2, side1_result)
-    result = 1 / (1 + 10 ** exponent)
-    return sign * round(k_factor(rating1, rating2, side1_result) * (1 - result), 0)
+    return callback
 
 def calculate_elo(df, conn):
     if not st.button('Calculate', use_container_width=True):
         return
 
-    pilots = unique(df, 'Username')
-    elo = {pilot: 1500 for pilot in pilots.tolist()}
+    arrays = match_arrays(df)
+    elo_system = ELO_Rating_System(len(arrays['pilot_names']), k_factor=k_factor, rating_base=rating_base)
 
     sub_table = df[['MatchID', 'Team', 'Username', 'MatchResult']].copy()
-    sub_table['Rating'] = 0
-    sub_table['Rating_change'] = 0
-
-    processed_games = 0
-    container = st.empty()
-    for _, game_group in sub_table.groupby('MatchID', sort=False):
-        team_elos = game_group.groupby('Team')['Username'].apply(
-            lambda x: sum(elo[p] for p in x) // len(x)
-        )
-        
-        for _, match in game_group.groupby('Team'):
-            team_result = match['MatchResult'].iloc[0]
-            for index, row in match.iterrows():
-                player = row['Username']
-                
-                opponent_team = '2' if row['Team'] == '1' else '1'
-                opponent_team_elo = int(team_elos[opponent_team])
-                
-                elo_change = elo_rating_change(elo[player], opponent_team_elo, team_result)
-                new_elo = elo[player] + elo_change
-                elo[player] = new_elo
-
-                sub_table.loc[index, 'Rating'] = new_elo
-                sub_table.loc[index, 'Rating_change'] = elo_change
-
-        processed_games += 1
-        if processed_games % 100 == 0:
-            container.write(f"Processed games: {processed_games}")
+    sub_table['Rating'], sub_table['Rating_change'] = elo_system.process(arrays)
 
     sub_table.to_sql('temp_table', conn, if_exists='replace', index=False)
 
@@ -113,59 +84,47 @@ def update_columns(conn):
     run_query(conn, "ALTER TABLE CompData ADD COLUMN RatingBase NUMERIC")
     run_query(conn, "ALTER TABLE CompData ADD COLUMN RatingUncertainty NUMERIC")
 
-def historical_data(df):
-    first_ten_records = df.groupby("Chassis").head(10)
-    aggregated_values = first_ten_records.groupby("Chassis").agg(
-        # Tonnage=('Tonnage', 'max'),
-        MatchScore=('MatchScore', 'mean'),
-        Kills=('Kills', 'mean'),
-        KillsMostDamage=('KillsMostDamage', 'mean'),
-        Assists=('Assists', 'mean'),
-        ComponentsDestroyed=('ComponentsDestroyed', 'mean'),
-        Damage=('Damage', 'mean'),
-        Uses=('MatchID', 'count')
-    ).to_dict(orient='index')
-
-    return aggregated_values
+def historical_data(df, indicators, threshold):
+    return Chassis_Baseline.from_history(df, indicators, threshold)
+
+def chassis_baseline_options():
+    options = ['Collect while rating', 'Precompute from history']
+    if path.exists(BASELINE_FILE):
+        options.append('Reuse saved baseline')
+
+    return st.radio('Chassis baseline', options, horizontal=True)
 
 def calculate_skill(df, conn):
+    baseline_option = chassis_baseline_options()
     if not st.button('Calculate', use_container_width=True):
         return
     
     from utility.rating import MWO_Rating_System
 
     mwo_rating = MWO_Rating_System()
-    
-    sub_table = df[['MatchID', 'Team', 'Username', 'MatchResult']].copy()
-    sub_table['PilotRating'] = 0.0
-    sub_table['TeamRating'] = 0.0
-    sub_table['OpponentRating'] = 0.0
-    sub_table['RatingBase'] = 0.0
-    sub_table['RatingUncertainty'] = 0.0
+    if baseline_option == 'Precompute from history':
+        mwo_rating.populate_chassis_stats(historical_data(df, mwo_rating.performance_indicators, mwo_rating.historic_stats_threshold))
+    elif baseline_option == 'Reuse saved baseline':
+        mwo_rating.populate_chassis_stats(Chassis_Baseline.load(BASELINE_FILE))
+    arrays = match_arrays(df)
+    elo_system = ELO_Rating_System(len(arrays['pilot_names']), k_factor=k_factor, rating_base=rating_base)
 
-    processed_games = 0
     container = st.empty()
-    for _, match in df.groupby('MatchID', sort=False):
-        records = mwo_rating.process_match(match)
-        for key, value in records.items():
-            sub_table.loc[key, 'PilotRating'] = value['PilotRating']
-            sub_table.loc[key, 'TeamRating'] = value['TeamRating']
-            sub_table.loc[key, 'OpponentRating'] = value['OpponentRating']
-            sub_table.loc[key, 'RatingBase'] = value['RatingBase']
-            sub_table.loc[key, 'RatingUncertainty'] = value['RatingUncertainty']
-        
-        processed_games += 1
-        if processed_games % 100 == 0:
-            container.write(f"Processed games: {processed_games}")
-        # break
+    ratings = rating_pass(df, arrays, elo_system=elo_system, skill_system=mwo_rating, callback=progress_callback(container))
 
+    mwo_rating.baseline.save(BASELINE_FILE)
+
+    processed_games = len(arrays['offsets']) - 1
     container.write(f"Processed games: {processed_games}, correct predictions: {mwo_rating.correct_predictions}, brackets: {mwo_rating.prediction_brackets}")
 
+    sub_table = pd.concat([df[['MatchID', 'Team', 'Username', 'MatchResult']], ratings], axis=1)
     sub_table.to_sql('temp_table', conn, if_exists='replace', index=False)
 
     run_query(conn, """
         UPDATE CompData
         SET
+            Rating = temp_table.Rating,
+            Rating_change = temp_table.Rating_change,
             PilotRating = temp_table.PilotRating,
             TeamRating = temp_table.TeamRating,
             OpponentRating = temp_table.OpponentRating,
@@ -182,6 +141,11 @@ def calculate_skill(df, conn):
 
     run_query(conn, "DROP TABLE temp_table")
 
+    write_rating_history(*rating_history(df, arrays, ratings))
+
+    match_data = pd.concat([df[['MatchID', 'Tournament', 'Division', 'CompleteTime', 'WinningTeam', 'Team', 'Username']], ratings], axis=1)
+    write_match_predictions(match_predictions(match_data, mwo_rating.model))
+
 back_button()
 header()
 
@@ -1,18 +1,16 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import numpy as np
 
-from utility.requests import jarls_pilot_stats
-from utility.methods import filter_dataframe, nunique, safe_division, unique
-from utility.database import read_comp_data
+from utility.requests import jarls_client
+from utility.methods import safe_division, error
+from utility.database import comp_data, data_version
 from utility.blocks import metrics_block
+from utility.prediction import win_predictor
+from utility.stats import group_stats
+from utility.index import pilot_index
 
-COMP_DATA = read_comp_data()
-AVERAGE_GAMES = COMP_DATA.groupby('Username')['Username'].value_counts().mean()
-DIVISIONS = unique(COMP_DATA, 'Division').to_list()
-DIVISION_DECODING = {i + 1:DIVISIONS[i] for i in range(len(DIVISIONS))}
-DIVISION_ENCODING = {value:key for key, value in DIVISION_DECODING.items()}
+COLUMNS = ['Tournament', 'Division', 'Username', 'MatchID', 'MatchResult', 'Win']
 
 def back_button():
     if st.button('< Back'):
@@ -32,19 +30,47 @@ def display_inputs():
         team1_pilots = [pilot.strip().lower() for pilot in team1.splitlines() if pilot]
         team2_pilots = [pilot.strip().lower() for pilot in team2.splitlines() if pilot]
         
+        version = data_version()
+        df = comp_data(version, tuple(COLUMNS))
+        index = pilot_index(version)
+
         col1, col2 = st.columns(2)
         
-        display_stats(col1, team1_pilots, COMP_DATA)
-        display_stats(col2, team2_pilots, COMP_DATA)
+        tables = [
+            display_stats(col1, team1_pilots, df, index),
+            display_stats(col2, team2_pilots, df, index)
+        ]
 
-def display_stats(container, pilots, df):
-    if not pilots:
+        display_prediction(team1_pilots, team2_pilots)
+
+        fill_ranks([table for table in tables if table], team1_pilots + team2_pilots, index)
+
+def display_prediction(team1_pilots, team2_pilots):
+    if not team1_pilots or not team2_pilots:
         return
+
+    predictor = win_predictor(data_version())
+    probability = predictor.predict_match(team1_pilots, team2_pilots)
+    unrated = [pilot for pilot in team1_pilots + team2_pilots if not predictor.rated(pilot)]
+
+    metrics = {
+        'Team 1 win probability': f'{probability:.0%}',
+        'Team 2 win probability': f'{1 - probability:.0%}',
+        'Pilots without rating': len(unrated)
+    }
+    metrics_block(metrics)
+
+def display_stats(container, pilots, df, index):
+    """Renders pilot stats of a team, QP ranks are filled in later by `fill_ranks()`."""
+    if not pilots:
+        return None
     
-    pilots_data = df[df['Username'].str.lower().isin(pilots)]
+    pilots_data = df.iloc[index.rows(pilots)]
     with container:
         display_metrics(pilots_data)
 
+    divisions = calculate_pilot_division(index, pilots)
+
     team_data = {
         'Pilot': [],
         'Rank': [],
@@ -55,53 +81,36 @@ def display_stats(container, pilots, df):
         'Confidence': []
     }
     for pilot in pilots:
-        pilot_stats = jarls_pilot_stats(pilot)
+        key = pilot.casefold()
+        comp_games = int(index.games.get(key, 0))
         
-        pilot_data = pilots_data[pilots_data['Username'].str.lower() == pilot.lower()].copy()
-        division, confidence = calculate_pilot_division(pilot_data)
-        comp_games = nunique(pilot_data, 'MatchID')
-        
-        if pilot_stats:
-            team_data['Pilot'].append(pilot_stats['PilotName'])
-            team_data['Rank'].append(pilot_stats['Rank'])
-        else:
-            team_data['Pilot'].append(pilot)
-            team_data['Rank'].append(0)
+        team_data['Pilot'].append(pilot)
+        team_data['Rank'].append(0)
         team_data['CompGames'].append(comp_games)
 
         if comp_games:
-            highest_div = pilot_data['Division'].min()
+            division_games = index.division_games.loc[key]
+            highest_div = division_games.index.min()
             team_data['HighestDiv'].append(highest_div)
+            team_data['HighestDivGames'].append(int(division_games[highest_div]))
 
-            highest_div_games = nunique(filter_dataframe(pilot_data, 'Division', highest_div), 'MatchID')
-            team_data['HighestDivGames'].append(highest_div_games)
-
-            team_data['AverageDiv'].append(division)
-            team_data['Confidence'].append(confidence)
+            team_data['AverageDiv'].append(divisions.at[key, 'AverageDiv'])
+            team_data['Confidence'].append(divisions.at[key, 'Confidence'])
         else:
             team_data['HighestDiv'].append('--')
             team_data['HighestDivGames'].append(0)
             team_data['AverageDiv'].append(0)
             team_data['Confidence'].append(0)
 
-    team_data = pd.DataFrame.from_dict(team_data).sort_values(by=['HighestDiv','CompGames','Rank'], ascending=[True, False, True])
+    team_data = pd.DataFrame(team_data, index=pilots)
     team_division = team_data[team_data['AverageDiv'] > 0]['AverageDiv'].mean()
     team_confidence = team_data[team_data['Confidence'] > 0]['Confidence'].mean()
 
-    team_data['AverageDiv'] = [decode_division(value) for value in team_data['AverageDiv']]
-    team_data['Confidence'] = round(100 * team_data['Confidence'], 1)
-    team_data.columns = ['Pilot', 'QP Rank', 'Games', 'Div (High)', 'Games (High)', 'Div (Avg)', 'Conf.']
-
-    df_height = 35 * (team_data.shape[0] + 1) + 3
-    container.dataframe(team_data, hide_index=True, use_container_width=True, height=df_height)
-    container.info(f'Division: {decode_division(team_division)} ({float(team_division):.2})\n\nConfidence: {team_confidence:.1%}')
+    table = container.empty()
+    display_team_table(table, team_data, index)
+    container.info(f'Division: {decode_division(index, team_division)} ({float(team_division):.2})\n\nConfidence: {team_confidence:.1%}')
 
-    grouped_df = pilots_data.groupby('Division').agg({
-        'MatchResult': [
-            ('Total', 'count'),
-            ('Wins', lambda x: (x == 'WIN').sum())
-        ]
-    }).droplevel(0, axis=1).reset_index()
+    grouped_df = group_stats(pilots_data, 'Division', Total=('MatchResult', 'count'))
 
     # Convert wide dataframe to a tall one
     tall_df = pd.melt(grouped_df,
@@ -117,6 +126,33 @@ def display_stats(container, pilots, df):
     )
     container.altair_chart(chart, use_container_width=True)
 
+    return table, team_data
+
+def display_team_table(table, team_data, index):
+    team_data = team_data.sort_values(by=['HighestDiv','CompGames','Rank'], ascending=[True, False, True])
+    team_data = team_data.assign(
+        AverageDiv=[decode_division(index, value) for value in team_data['AverageDiv']],
+        Confidence=round(100 * team_data['Confidence'], 1)
+    )
+    team_data.columns = ['Pilot', 'QP Rank', 'Games', 'Div (High)', 'Games (High)', 'Div (Avg)', 'Conf.']
+
+    df_height = 35 * (team_data.shape[0] + 1) + 3
+    table.dataframe(team_data, hide_index=True, use_container_width=True, height=df_height)
+
+def fill_ranks(tables, pilots, index):
+    """Looks up all the pilots on Jarl's list concurrently and updates the tables as the ranks arrive."""
+    for pilot, pilot_stats, message in jarls_client().stream(pilots):
+        if message:
+            error(message)
+
+        if not pilot_stats:
+            continue
+
+        for table, team_data in tables:
+            if pilot in team_data.index:
+                team_data.loc[pilot, ['Pilot', 'Rank']] = [pilot_stats['PilotName'], pilot_stats['Rank']]
+                display_team_table(table, team_data, index)
+
 def display_metrics(df):
     match_stats = df.groupby('MatchID')['MatchResult'].value_counts().reset_index()
     total_games = match_stats['count'].sum()
@@ -131,32 +167,14 @@ def display_metrics(df):
     }
     metrics_block(metrics)
 
-def calculate_pilot_division(df):
-    special_divisions = ['S', 'Swiss']
-    groupped_data = df[~df['Division'].isin(special_divisions)].groupby(['Tournament', 'Division'], sort=False).agg(
-        Games=('MatchID', 'count'),
-        Losses=('MatchResult', lambda x: (x == 'LOSS').sum())
-    ).reset_index()
-
-    total_games = groupped_data['Games'].sum()
-    groupped_data['Lossrate'] = groupped_data['Losses'] / groupped_data['Games']
-    groupped_data['Weight'] = groupped_data['Games'] / total_games
-    groupped_data['Division'] = [DIVISION_ENCODING[label] for label in groupped_data['Division']]
-
-    groupped_data['AdjustedWeight'] = groupped_data['Weight'] * weights_range(0.8, 1.2, groupped_data.shape[0]) if groupped_data.shape[0] > 2 else groupped_data['Weight']
-    average_division = ((groupped_data['Division'] + 2 * (groupped_data['Lossrate'] - 0.5)) * groupped_data['AdjustedWeight']).sum()
-
-    confidence = min(1.0, float(total_games) / AVERAGE_GAMES)
-
-    return average_division, confidence
-
-def weights_range(start, stop, count):
-    return np.linspace(start, stop, num=count)
+def calculate_pilot_division(index, pilots):
+    """Average division and confidence of all the pilots, see `Pilot_Index.divisions()`."""
+    return index.divisions(pilots)
 
-def decode_division(division):
+def decode_division(index, division):
     if division > 0:
         estimated_div = int(round(division))
-        return DIVISION_DECODING[estimated_div] if estimated_div > 0 else "A+"
+        return index.division_decoding[estimated_div] if estimated_div > 0 else "A+"
     else:
         return "--"
 
@@ -1,6 +1,7 @@
 import streamlit as st
 
-from utility.database import read_comp_data
+from utility.database import read_comp_data, DERIVED_COLUMNS
+from utility.index import comp_data_index
 from utility.blocks import filters_block
 from utility.methods import unique
 
@@ -10,14 +11,14 @@ def header():
 def filters():
     df = read_comp_data()
     options = {'Tournament': None, 'Division': None, 'TeamName': 'Team', 'Map': None}
-    df, options = filters_block(df, options)
+    df, options = filters_block(df, options, index=comp_data_index())
 
     return df
 
 def generate_button(df):
     button_pressed = st.button('Generate file with all data', use_container_width=True)
     if button_pressed:
-        download_button(df)
+        download_button(df.drop(columns=DERIVED_COLUMNS, errors='ignore'))
 
     button_pressed = st.button('Generate file with only match IDs', use_container_width=True)
     if button_pressed:
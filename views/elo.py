@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
-from utility.database import read_comp_data
-from utility.methods import safe_division, filter_dataframe
+from utility.database import read_comp_data, read_rating_history, data_version
+from utility.charts import cached_chart, embedded, scatter_chart_rating_uncertainty
+from utility.methods import filter_dataframe, downsample_lttb
+from utility.stats import group_stats
 from utility.blocks import filters_block
+from utility.globals import get_chart_points_budget
 # from utility.methods import
 
 from datetime import datetime, timedelta
@@ -16,18 +19,13 @@ def filters(df):
     options = {'Username': 'Pilot'}
     return filters_block(df, options)
 
-def calculate_wlr(values):
-    return safe_division(values.eq('WIN').sum(), values.eq('LOSS').sum())
-
 def leaderboard_data(df):
-    df['CompleteTime'] = pd.to_datetime(df['CompleteTime'], format='ISO8601').dt.tz_convert(None)
     two_years_ago = datetime.now() - timedelta(days=730)
 
-    current_top100 = df[df['CompleteTime'] > two_years_ago].groupby('Username').last().sort_values(by='PilotRating', ascending=False).reset_index().head(100)
-    filtered_df = df[df['Username'].isin(current_top100['Username'])].copy()
+    current_top100 = df[df['Time'] > two_years_ago].groupby('Username').last().sort_values(by='PilotRating', ascending=False).reset_index().head(100)
+    filtered_df = df[df['Username'].isin(current_top100['Username'])]
 
-    filtered_df['Deaths'] = [1 if health == 0 else 0 for health in filtered_df['HealthPercentage']]
-    pilot_stats = filtered_df.groupby(['Username'], as_index=False).agg(
+    pilot_stats = group_stats(filtered_df, 'Username',
         Tonnage=('Tonnage', 'mean'),
         MS=('MatchScore', 'mean'),
         Kills=('Kills', 'mean'),
@@ -37,7 +35,6 @@ def leaderboard_data(df):
         Deaths=('Deaths', 'mean'),
         DMG=('Damage', 'mean'),
         TD=('TeamDamage', 'mean'),
-        WLR=('MatchResult', lambda values: calculate_wlr(values)),
         Games=('MatchID','nunique'),
         Score=('Score','sum'),
         Rating=('PilotRating','last')
@@ -47,32 +44,21 @@ def leaderboard_data(df):
 
     return pilot_stats
 
+def rating_uncertainty_chart(df):
+    # Summary dataframe: latest rating for every player
+    latest_stats = df.sort_values('CompleteTime').groupby('Username').tail(1)[['Username', 'RatingBase', 'RatingUncertainty']]
+
+    # Add a 'Games Played' column to color the dots (context is key!)
+    game_counts = df['Username'].value_counts().reset_index()
+    game_counts.columns = ['Username', 'TotalGames']
+    latest_stats = latest_stats.merge(game_counts, on='Username')
+
+    return scatter_chart_rating_uncertainty(latest_stats)
+
 def display_data(df, leaderboard):
-    def get_team_names(df, match_ids):
-        subset_df = df[df['MatchID'].isin(match_ids)]
-        return pd.pivot_table(subset_df, values='TeamName', index='MatchID', columns='Team', aggfunc='max').to_dict(orient='index')
-    
     filtered_df, options = filters(df)
     if not options['Username']:
-        # Create a summary dataframe: latest rating for every player
-        latest_stats = df.sort_values('CompleteTime').groupby('Username').tail(1)
-
-        # Add a 'Games Played' column to color the dots (context is key!)
-        game_counts = df['Username'].value_counts().reset_index()
-        game_counts.columns = ['Username', 'TotalGames']
-        latest_stats = latest_stats.merge(game_counts, on='Username')
-
-        scatter = alt.Chart(latest_stats).mark_point(opacity=0.5).encode(
-            x=alt.X('RatingBase:Q', title='Mean Rating (Mu)'),
-            y=alt.Y('RatingUncertainty:Q', title='Uncertainty (Sigma)'),
-            color=alt.Color('TotalGames:Q', scale=alt.Scale(scheme='viridis'), title='Games Played'),
-            tooltip=['Username', 'RatingBase', 'RatingUncertainty', 'TotalGames']
-        ).properties(
-            title="Base rating vs. Uncertainty level",
-            width=800,
-            height=500
-        ).interactive()
-
+        scatter = cached_chart('rating_uncertainty', data_version(), rating_uncertainty_chart, df)
         st.altair_chart(scatter, use_container_width=True)
 
         df_height = 35 * (leaderboard.shape[0] + 1) + 3
@@ -82,35 +68,42 @@ def display_data(df, leaderboard):
         column_order = ['Rank', 'Pilot', 'Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'DMG', 'TD', 'WLR', 'Games', 'Score', 'Rating']
         st.dataframe(leaderboard, hide_index=True, column_order=column_order, use_container_width=True, height=df_height)
     else:
-        filtered_df = filtered_df.copy()
-        match_ids = filtered_df['MatchID'].drop_duplicates()
-        team_names = get_team_names(df, match_ids)
-        filtered_df['Opponent'] = filtered_df.apply(
-            lambda row: team_names[row['MatchID']]['2' if row['Team'] == '1' else '1'],
-            axis=1
-        )
+        history = read_rating_history(tuple(options['Username']), data_version())
+        budget = get_chart_points_budget()
         
         for pilot in options['Username']:
-            pilot_data = filter_dataframe(filtered_df, 'Username', pilot)
-            
-            pilot_data = pilot_data.sort_values('CompleteTime').reset_index()
-            pilot_data['GameNumber'] = pilot_data.index + 1
+            pilot_data = filter_dataframe(history, 'Username', pilot)
+            games = pilot_data.shape[0]
+            if not games:
+                continue
+
+            pilot_data = pilot_data.rename(columns={'MatchOrdinal': 'GameNumber', 'Rating': 'PilotRating', 'Sigma': 'RatingUncertainty'})
+            pilot_data['CompleteTime'] = pd.to_datetime(pilot_data['CompleteTime'], unit='s')
 
-            pilot_data['Year'] = pd.to_datetime(pilot_data['CompleteTime']).dt.year
+            pilot_data['Year'] = pilot_data['CompleteTime'].dt.year
             year_data = pilot_data.groupby('Year')['GameNumber'].agg(['min', 'max', 'mean']).reset_index()
 
+            if budget:
+                pilot_data = pilot_data.iloc[downsample_lttb(pilot_data['GameNumber'], pilot_data['PilotRating'], budget)]
+
+            details = filtered_df[(filtered_df['Username'] == pilot) & filtered_df['MatchID'].isin(pilot_data['MatchID'])]
+            details = details[['MatchID', 'Tournament', 'Division', 'TeamName', 'Team', 'Map', 'MatchResult', 'OpponentTeamName']].rename(
+                columns={'OpponentTeamName': 'Opponent'}
+            )
+            pilot_data = pilot_data.merge(details, on='MatchID', how='left')
+
             pilot_data['Upper'] = pilot_data['PilotRating'] + pilot_data['RatingUncertainty']
             pilot_data['Lower'] = pilot_data['PilotRating'] - pilot_data['RatingUncertainty']
 
             minimum_rating = pilot_data['Lower'].min()
             maximum_rating = pilot_data['Upper'].max()
-            games = pilot_data.shape[0]
 
             domain = ['PilotRating', 'OpponentRating', 'TeamRating']
             division_scale = alt.Scale(scheme='dark2')
             
             # Baseline data and chart shape
-            base = alt.Chart(pilot_data).transform_fold(
+            columns = ['GameNumber', 'CompleteTime', 'Tournament', 'Division', 'TeamName', 'Opponent', 'Map', 'MatchResult', 'Lower', 'Upper'] + domain
+            base = alt.Chart(embedded(pilot_data, columns, pilot, series=('GameNumber', 'PilotRating'))).transform_fold(
                 domain,
                 as_=['RatingType', 'RatingValue'] 
             ).encode(
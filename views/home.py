@@ -1,22 +1,23 @@
 import streamlit as st
 import pandas as pd
 
-from utility.database import read_comp_data
-from utility.methods import nunique, unique
-from utility.charts import line_chart_submitted_games
+from utility.database import data_version
+from utility.charts import line_chart_submitted_games, cached_chart
 from utility.blocks import metrics_block
+from utility.cube import query, distinct
 
 def header():
     st.header('Welcome to MWO Stats Tool!')
 
-def general_statistics(df):
+def general_statistics():
     # Metrics
-    tournaments = nunique(df, 'Tournament')
-    teams = nunique(df, 'TeamName')
-    players = nunique(df, 'Username')
-    games = nunique(df, 'MatchID')
+    tournaments = distinct('players', 'Tournament')
+    teams = distinct('players', 'TeamName')
+    players = distinct('players', 'Username')
+    matches = query('matches', measures=['Games', 'FirstTime'])
+    games = int(matches['Games'])
 
-    start_date = pd.to_datetime(df['CompleteTime'].iloc[0], format='ISO8601').strftime("%Y-%m-%d") if df.size > 0 else "--/--/----"
+    start_date = pd.to_datetime(matches['FirstTime'], unit='s').strftime("%Y-%m-%d") if games > 0 else "--/--/----"
 
     metrics = {
         'Tournaments': tournaments,
@@ -29,26 +30,22 @@ def general_statistics(df):
 
     st.divider()
 
-def submitted_games(df):
-    df['CompleteTime'] = pd.to_datetime(df['CompleteTime'], format='ISO8601')
-    st.altair_chart(line_chart_submitted_games(df), use_container_width=True)
+def submitted_games():
+    chart = cached_chart('submitted_games', data_version(), lambda: line_chart_submitted_games(query('months', ['Month'])))
+    st.altair_chart(chart, use_container_width=True)
 
-def recently_added(df):
+def recently_added(matches):
     st.write('Last 10 uploaded games:')
 
-    unique_matches = df['MatchID'].unique()
-    last_10_matches = unique_matches[-10:]
-
-    result = df[df['MatchID'].isin(last_10_matches)].copy()
-    result['CompleteTime'] = pd.to_datetime(result['CompleteTime'], format='ISO8601')
-    
-    result = result.sort_values(by=['CompleteTime', 'MatchID', 'MatchResult'], ascending=False).groupby('MatchID').agg(
-        Map=('Map', 'first'),
-        Team1=('TeamName', 'first'),
-        Result=('MatchResult', 'first'),
-        Team2=('TeamName', 'last')
-    ).reset_index()
-    result['MatchID'] = result['MatchID'].astype(str)
+    result = matches.tail(10).iloc[::-1]
+    team1_won = result['WinningTeam'] == '1'
+    result = pd.DataFrame({
+        'MatchID': result['MatchID'].astype(str),
+        'Map': result['Map'],
+        'Team1': result['Team1Name'].where(team1_won, result['Team2Name']),
+        'Result': 'WIN',
+        'Team2': result['Team2Name'].where(team1_won, result['Team1Name'])
+    })
 
     result.columns = ['ID', 'Map', 'Team 1', 'Result', 'Team 2']
 
@@ -82,8 +79,7 @@ def introduction():
 
     st.write('You may find Charts and Leaderboard settings there. They can help give you different sorting options or better presentation on lower display resolutions.')
 
-df = read_comp_data()
-
 header()
-general_statistics(df)
+general_statistics()
+submitted_games()
 introduction()
@@ -1,22 +1,29 @@
 import streamlit as st
-import numpy as np
 
-from utility.database import read_comp_data
-from utility.blocks import filters_block
-from utility.methods import safe_division
+from utility.database import comp_data, data_version
+from utility.index import comp_data_index
+from utility.blocks import filter_options
+from utility.methods import filters_key, apply_filters
+from utility.caching import page_cache
+from utility.stats import group_stats, kdr, awlr
 from utility.globals import get_leaderboard_size, get_leaderboard_default_sorting, get_leaderboard_aggregation_method
 from utility.enums import SortingOption, AggregationMethod
+from utility.form import recent_form, FORM_WINDOWS, FORM_METRICS
+
+COLUMNS = [
+    'Tournament', 'Division', 'TeamName', 'Username', 'MatchID', 'Win', 'Death',
+    'Score', 'Tonnage', 'Kills', 'KillsMostDamage', 'Assists', 'ComponentsDestroyed', 'MatchScore',
+    'Damage', 'TeamDamage'
+]
 
 def header():
     st.header('Leaderboard')
 
 def filters():
-    df = read_comp_data()
     options = {'Tournament': None, 'Division': None, 'TeamName': 'Team', 'Username': 'Player'}
-    return filters_block(df, options)
+    return filter_options(options, comp_data_index())
 
-def get_sorting_settings():
-    value = get_leaderboard_default_sorting()
+def get_sorting_settings(value):
     match value:
         case SortingOption.Score: return ['Score', 'Games', 'MS'], [False, True, False]
         case SortingOption.WLR: return ['WLR', 'Games', 'MS'], [False, False, False]
@@ -25,20 +32,6 @@ def get_sorting_settings():
         case SortingOption.Damage: return ['DMG', 'Games', 'MS'], [False, True, False]
         case _: return ['Score', 'Games', 'MS'], [False, True, False]
 
-def calculate_wlr(values):
-    return safe_division(values.eq('WIN').sum(), values.eq('LOSS').sum())
-
-def calculate_awlr(rating, games):
-    WLR_Scale = 1/200
-    return rating * (1 + games * WLR_Scale)
-
-def calculate_kdr(dividend, divisor):
-    result = dividend.div(divisor)
-    inf_mask = np.isinf(result)
-    result[inf_mask] = dividend[inf_mask]
-
-    return result
-
 def get_page_number(last_page):
     if 'page_number' not in st.session_state:
         page_number = 0
@@ -53,15 +46,13 @@ def get_page_number(last_page):
 def set_page_number(new_value):
     st.session_state['page_number'] = new_value
 
-def pilots_data(df):
-    value = get_leaderboard_aggregation_method()
+def pilots_data(df, value):
     match value:
         case AggregationMethod.Mean: aggregation_method = 'mean'
         case AggregationMethod.Sum: aggregation_method = 'sum'
         case _: aggregation_method = 'mean'
 
-    df['Deaths'] = np.where(df['HealthPercentage'] == 0, 1, 0)
-    pilot_stats = df.groupby(['Username'], as_index=False).agg(
+    pilot_stats = group_stats(df, 'Username',
         Tonnage=('Tonnage', 'mean'),
         MS=('MatchScore', aggregation_method),
         Kills=('Kills', aggregation_method),
@@ -71,26 +62,38 @@ def pilots_data(df):
         Deaths=('Deaths', aggregation_method),
         DMG=('Damage', aggregation_method),
         TD=('TeamDamage', aggregation_method),
-        WLR=('MatchResult', lambda values: calculate_wlr(values)),
         TotalKills=('Kills', 'sum'),
         TotalDeaths=('Deaths', 'sum'),
         Games=('MatchID','nunique'),
         Score=('Score','sum')
     ).rename(columns={'Username': 'Pilot'})
 
-    pilot_stats['KDR'] = calculate_kdr(pilot_stats['TotalKills'], pilot_stats['TotalDeaths'])
-    pilot_stats['AWLR'] = calculate_awlr(pilot_stats['WLR'], pilot_stats['Games'])
+    pilot_stats['KDR'] = kdr(pilot_stats['TotalKills'], pilot_stats['TotalDeaths'])
+    pilot_stats['AWLR'] = awlr(pilot_stats['WLR'], pilot_stats['Games'])
 
     return pilot_stats
 
-def leaderboard(df):
-    pilot_stats = pilots_data(df)
-    
+@page_cache('leaderboard')
+def sorted_pilots_data(filters, version, sorting, aggregation):
+    """Aggregated and ranked leaderboard for the given filter state, pages are slices of this result."""
+    df = apply_filters(comp_data(version, tuple(COLUMNS)), filters)
+    pilot_stats = pilots_data(df, aggregation)
+
+    sorting_columns, sorting_order = get_sorting_settings(sorting)
+    pilot_stats = pilot_stats.sort_values(sorting_columns, ascending=sorting_order, ignore_index=True)
+    pilot_stats['Rank'] = pilot_stats.index + 1
+
+    pilot_stats = pilot_stats.join(recent_form(df), on='Pilot')
+
+    return pilot_stats
+
+@st.fragment
+def leaderboard_page(pilot_stats):
     page_size = get_leaderboard_size()
     last_page = pilot_stats.shape[0] // page_size
     page_number = get_page_number(last_page)
 
-    col1, _ , col2, col3, col4 = st.columns([4, 2, 1, 1, 1])
+    col1, col5, col2, col3, col4 = st.columns([4, 2, 1, 1, 1])
     with col1:
         with st.popover("Column descriptions:", use_container_width=True):
             st.markdown('''
@@ -108,7 +111,11 @@ def leaderboard(df):
                 - `AWLR`: Adjusted Wins to Losses ratio, gives slight advantage to whose who played more games preserving the same WLR. Calculated as WLR * (1 + Games / 200).
                 - `Games`: Total games played
                 - `Score`: Calculated by subtracting lost games from the games won
+                - `MS`, `DMG`, `WLR`, `Deaths` (last N): Recent form over the last N games within the selected filters
             ''')
+
+    with col5:
+        form_window = st.selectbox('Recent form', FORM_WINDOWS, index=None, format_func=lambda window: f'Last {window} games', placeholder='Recent form', label_visibility='collapsed')
     
     with col2:
         if st.button("Previous", use_container_width=True):
@@ -131,17 +138,21 @@ def leaderboard(df):
     
     start_idx = page_number * page_size 
     end_idx = (1 + page_number) * page_size
+    pilot_stats = pilot_stats.iloc[start_idx:end_idx]
     
-    sorting_columns, sorting_order = get_sorting_settings()
-    pilot_stats = pilot_stats.sort_values(sorting_columns, ascending=sorting_order, ignore_index=True).iloc[start_idx:end_idx]
-    pilot_stats['Rank'] = pilot_stats.index + 1
-    
+    form_labels = {f'{metric}{form_window}': f'{metric} (last {form_window})' for metric in FORM_METRICS} if form_window else {}
+    form_columns = list(form_labels)
+
     df_height = 35 * (pilot_stats.shape[0] + 1) + 3
-    pilot_stats = pilot_stats.style.format(subset=['Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'DMG', 'TD', 'WLR', 'AWLR', 'KDR'], formatter="{:.2f}")
+    pilot_stats = pilot_stats.style.format(subset=['Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'DMG', 'TD', 'WLR', 'AWLR', 'KDR'] + form_columns, formatter="{:.2f}")
+
+    column_order = ['Rank', 'Pilot', 'Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'KDR', 'DMG', 'TD', 'WLR', 'AWLR', 'Games', 'Score'] + form_columns
+    st.dataframe(pilot_stats, hide_index=True, column_order=column_order, column_config=form_labels, use_container_width=True, height=df_height)
 
-    column_order = ['Rank', 'Pilot', 'Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'KDR', 'DMG', 'TD', 'WLR', 'AWLR', 'Games', 'Score']
-    st.dataframe(pilot_stats, hide_index=True, column_order=column_order, use_container_width=True, height=df_height)
+def leaderboard(options):
+    pilot_stats = sorted_pilots_data(filters_key(options), data_version(), get_leaderboard_default_sorting(), get_leaderboard_aggregation_method())
+    leaderboard_page(pilot_stats)
 
 header()
-df, options = filters()
-leaderboard(df)
+options = filters()
+leaderboard(options)
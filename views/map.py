@@ -1,28 +1,35 @@
 import streamlit as st
 import pandas as pd
 
-from utility.database import read_comp_data
-from utility.methods import nunique, filter_dataframe, safe_division
+from utility.database import read_comp_data, read_match_teams, read_lineup_drops, weekly_table, data_version
+from utility.methods import safe_division, filters_key, apply_filters
 from utility.charts import bar_chart, stacked_ordered_bar_chart
+from utility.index import comp_data_index
 from utility.blocks import filters_block, metrics_block, charts_block
+from utility.stats import wlr
+from utility.cube import query
+from utility.trends import rolling_trends, TREND_WINDOW
+from utility.caching import page_cache
 
 import altair as alt
 
+COLUMNS = ['Tournament', 'Division', 'TeamName', 'Map']
+
 def header():
     st.header('Maps')
 
 def filters():
-    df = read_comp_data()
+    df = read_comp_data(COLUMNS)
     options = {'Tournament': None, 'Division': None, 'TeamName': 'Team', 'Map': None}
-    return filters_block(df, options)
+    return filters_block(df, options, index=comp_data_index())
 
-def general_statistics(df, options):
-    map_pool = nunique(df, 'Map')
-    games_played = nunique(df, 'MatchID')
+def general_statistics(options):
+    games_per_map = query('matches', ['Map'], filters_key(options), ['Games']).set_index('Map')['Games']
+    games_per_map = games_per_map[games_per_map > 0]
 
-    groupped_data = df.groupby('Map')
+    map_pool = games_per_map.size
+    games_played = int(games_per_map.sum())
 
-    games_per_map = groupped_data['MatchID'].nunique()
     most_played_map = games_per_map.idxmax()
     most_games = int(games_per_map.max())
 
@@ -35,33 +42,59 @@ def general_statistics(df, options):
     col3.metric('Most played', most_played_map, most_games, delta_color='off')
     col4.metric('Least played', least_played_map, least_games, delta_color='off')
 
-def map_statistics(df, options):
-    overview, details, mechs, tournaments = st.tabs(['Overview', 'Details', 'Mechs', 'Tournaments'])
+    maps_table(games_per_map, options)
+
+@page_cache('map')
+def map_trends(filters, version):
+    """Weekly games and Team 1 win rate of every map, the team filter does not apply to the weekly bins."""
+    scope = tuple((key, value) for key, value in filters if key in ('Tournament', 'Division', 'Map'))
+    weekly = apply_filters(weekly_table(version, 'WeeklyMaps'), scope)
+    return rolling_trends(weekly, 'Map', 'Games', 'Team1Wins', share=False)
+
+def maps_table(games_per_map, options):
+    maps = games_per_map.sort_values(ascending=False).rename('Games').to_frame().join(map_trends(filters_key(options), data_version()))
+    df_height = 35 * (maps.shape[0] + 1) + 3
+
+    column_config = {
+        'Games': st.column_config.NumberColumn('Games'),
+        'UsageTrend': st.column_config.LineChartColumn(f'Games ({TREND_WINDOW}-week rolling)', y_min=0),
+        'WinRateTrend': st.column_config.LineChartColumn(f'Team 1 win rate ({TREND_WINDOW}-week rolling)', y_min=0, y_max=1)
+    }
+    st.dataframe(maps.reset_index(), hide_index=True, column_config=column_config, use_container_width=True, height=df_height)
+
+def map_statistics(options):
+    overview, details, mechs, compositions, tournaments = st.tabs(['Overview', 'Details', 'Mechs', 'Compositions', 'Tournaments'])
+    with compositions:
+        kind = st.radio('Composition', ['Weight classes', 'Chassis'], horizontal=True, label_visibility='collapsed')
+
     for map in options['Map']:
-        map_data = filter_dataframe(df, 'Map', map)
+        filters = dict(filters_key(options), Map=map)
 
         with overview:
-            map_overview(map_data, map)
+            map_overview(filters, map)
         
         with details:
-            map_details(map_data, map)
+            map_details(filters, map)
 
         with mechs:
-            map_mechs(map_data, map)
+            map_mechs(filters, map)
+
+        with compositions:
+            map_compositions(filters, map, kind)
 
         with tournaments:
-            map_tournaments(map_data, map)
+            map_tournaments(filters, map)
 
-def map_overview(df, map):
+def map_overview(filters, map):
     st.subheader(map)
 
-    games_played = nunique(df, 'MatchID')
-    t1_games = filter_dataframe(df, 'Team', '1')
-    t1_wins = safe_division(filter_dataframe(t1_games, 'MatchResult', 'WIN').shape[0], t1_games.shape[0])
-    t2_games = filter_dataframe(df, 'Team', '2')
-    t2_wins = safe_division(filter_dataframe(t2_games, 'MatchResult', 'WIN').shape[0], t2_games.shape[0])
-    df.loc[:, 'MatchDuration'] = df['MatchDuration'].astype(int)
-    avg_duration = df['MatchDuration'].mean() / 60
+    matches = query('matches', filters=filters, measures=['Games', 'Duration'])
+    sides = query('teams', ['Team'], filters, ['Games', 'Wins']).set_index('Team').reindex(['1', '2'], fill_value=0)
+
+    games_played = int(matches['Games'])
+    t1_wins = safe_division(sides.at['1', 'Wins'], sides.at['1', 'Games'])
+    t2_wins = safe_division(sides.at['2', 'Wins'], sides.at['2', 'Games'])
+    avg_duration = safe_division(matches['Duration'], matches['Games']) / 60
 
     metrics = {
         'Games played': games_played,
@@ -73,19 +106,20 @@ def map_overview(df, map):
 
     st.divider()
 
-def map_details(df, map):
+def map_details(filters, map):
     st.subheader(map)
 
-    t1_games = filter_dataframe(df, 'Team', '1')
-    t2_games = filter_dataframe(df, 'Team', '2')
+    lances = query('lances', ['Team', 'Lance', 'Class'], filters).set_index(['Team', 'Lance', 'Class'])['Uses']
+    t1_games = lances[lances.index.get_level_values('Team') == '1'].droplevel('Team')
+    t2_games = lances[lances.index.get_level_values('Team') == '2'].droplevel('Team')
 
     lance_map = {'1': 'Alpha', '2': 'Bravo', '3': 'Charlie'}
     weight_class_order = ['LIGHT', 'MEDIUM', 'HEAVY', 'ASSAULT']
 
-    t1_data = t1_games.groupby(['Lance', 'Class']).size().reindex(weight_class_order, level=1).reset_index(name='Count')
+    t1_data = t1_games.reindex(weight_class_order, level=1).reset_index(name='Count')
     t1_data['Lance'] = t1_data['Lance'].replace(lance_map)
 
-    t2_data = t2_games.groupby(['Lance', 'Class']).size().reindex(weight_class_order, level=1).reset_index(name='Count')
+    t2_data = t2_games.reindex(weight_class_order, level=1).reset_index(name='Count')
     t2_data['Lance'] = t2_data['Lance'].replace(lance_map)
 
     charts = [
@@ -96,13 +130,14 @@ def map_details(df, map):
     
     st.divider()
 
-def map_mechs(df, map):
+def map_mechs(filters, map):
     st.subheader(map)
 
-    top_chassis = df['Chassis'].value_counts().sort_values(ascending=False).head(10).reset_index()
+    chassis_stats = query('map_chassis', ['Chassis'], filters)
+    chassis_stats['WLR'] = wlr(chassis_stats['Wins'], chassis_stats['Uses'] - chassis_stats['Wins'])
 
-    chassis_stats = df.groupby('Chassis')['MatchResult'].apply(lambda x: safe_division(x.value_counts().get('WIN', 0), x.value_counts().get('LOSS', 0)))
-    chassis_stats = chassis_stats.reset_index().rename(columns={'MatchResult': 'WLR'}).sort_values(by=['WLR'], ascending=False).head(10)
+    top_chassis = chassis_stats[['Chassis', 'Uses']].rename(columns={'Uses': 'count'}).sort_values(by='count', ascending=False).head(10)
+    chassis_stats = chassis_stats.sort_values(by=['WLR'], ascending=False).head(10)
 
     charts = [
         bar_chart(top_chassis, 'Most used chassis', 'Chassis', 'count'),
@@ -112,13 +147,55 @@ def map_mechs(df, map):
     
     st.divider()
 
-def map_tournaments(df, map):
-    map_data = df[['MatchID', 'Tournament', 'Team', 'MatchResult']].drop_duplicates()
+# Lineup description and signature columns of MatchTeams per composition kind
+COMPOSITIONS = {
+    'Weight classes': ('ClassLineup', 'ClassSignature'),
+    'Chassis': ('ChassisLineup', 'ChassisSignature')
+}
+
+def map_compositions(filters, map, kind):
+    st.subheader(map)
+
+    lineup, signature = COMPOSITIONS[kind]
+    facts = apply_filters(read_match_teams(), tuple(filters.items()))
+    compositions = facts.groupby([signature, lineup], as_index=False).agg(
+        Games=('MatchID', 'count'),
+        Wins=('Win', 'sum')
+    )
+    compositions['WinRate'] = compositions['Wins'] / compositions['Games']
+    compositions = compositions.sort_values(['Games', 'WinRate'], ascending=False, ignore_index=True).head(15)
+
+    selection = st.dataframe(
+        compositions[[lineup, 'Games', 'Wins', 'WinRate']].rename(columns={lineup: 'Composition', 'WinRate': 'Win rate'}).style.format(subset=['Win rate'], formatter="{:.0%}"),
+        hide_index=True,
+        use_container_width=True,
+        on_select='rerun',
+        selection_mode='single-row',
+        key=f'compositions_{map}'
+    )
+
+    # All drops with the selected composition, on any map
+    if selection.selection.rows:
+        composition = compositions.iloc[selection.selection.rows[0]]
+        drops = read_lineup_drops(signature, composition[signature])
+        drops = pd.DataFrame({
+            'MatchID': drops['MatchID'].astype(str),
+            'Time': pd.to_datetime(drops['MatchTime'], unit='s'),
+            'Tournament': drops['Tournament'],
+            'Division': drops['Division'],
+            'Map': drops['Map'],
+            'Team': drops['TeamName'],
+            'Opponent': drops['OpponentTeamName'],
+            'Result': drops['Win'].map({1: 'WIN', 0: 'LOSS'})
+        }).iloc[::-1]
+
+        st.write(f"Drops with `{composition[lineup]}`: {drops.shape[0]}")
+        st.dataframe(drops, hide_index=True, use_container_width=True)
+
+    st.divider()
 
-    map_data = map_data.groupby(['Tournament', 'Team'])['MatchResult'].agg([
-        ('Wins', lambda x: (x == 'WIN').sum()),
-        ('Total', 'count')
-    ]).copy().reset_index()
+def map_tournaments(filters, map):
+    map_data = query('teams', ['Tournament', 'Team'], filters, ['Games', 'Wins']).rename(columns={'Games': 'Total'})
     map_data['WinRate'] = map_data['Wins'] / map_data['Total']
 
     bars = alt.Chart(map_data).mark_bar().encode(
@@ -161,8 +238,8 @@ def map_tournaments(df, map):
     st.divider()
 
 header()
-df, options = filters()
+_, options = filters()
 if options['Map']:
-    map_statistics(df, options)
+    map_statistics(options)
 else:
-    general_statistics(df, options)
+    general_statistics(options)
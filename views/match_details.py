@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 
 from utility.methods import error, parse_match_ids
-from utility.requests import fetch_api_data, new_record, match_data_columns
+from utility.requests import fetch_matches, new_record, match_data_columns
 from utility.datasources import mech_data
 from utility.blocks import metrics_block
 
@@ -88,12 +88,16 @@ def display_match_details(id, details):
     teams_block(teams, team1_score, team2_score)
 
 def get_match_details(id_list):
+    """Fetches all the matches concurrently, failed IDs are reported and left out of the result."""
     result = {}
-    for match_id in id_list:
-        json_data = fetch_api_data(match_id)
-        if not json_data:
-            st.stop()
-        result[match_id] = json_data
+    for match_id, (json_data, message) in fetch_matches(id_list).items():
+        if message:
+            error(message)
+        elif json_data:
+            result[match_id] = json_data
+
+    if not result:
+        st.stop()
 
     return result
 
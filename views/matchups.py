@@ -0,0 +1,74 @@
+import streamlit as st
+
+from utility.database import read_comp_data, fact_table, data_version
+from utility.methods import filters_key, apply_filters
+from utility.charts import heatmap_chart_matchups
+from utility.caching import page_cache
+from utility.index import comp_data_index
+from utility.blocks import filters_block, metrics_block
+from utility.matchups import matchup_pairs, matchup_teams, head_to_head_matches
+
+COLUMNS = ['Tournament', 'Division', 'Map', 'TeamName']
+
+# Filters applied to the matches, the team filter only picks the matrix rows
+MATCH_FILTERS = ['Tournament', 'Division', 'Map']
+
+MAX_TEAMS = 25
+
+def header():
+    st.header('Head-to-head')
+
+def filters():
+    df = read_comp_data(COLUMNS)
+    options = {'Tournament': None, 'Division': None, 'Map': None, 'TeamName': 'Team'}
+    return filters_block(df, options, index=comp_data_index())
+
+def filtered_matches(filters, version):
+    return apply_filters(fact_table(version, 'Matches'), filters)
+
+@page_cache('matchups')
+def matchups_data(filters, version):
+    """Records of every pair of teams in the matches left by the filters."""
+    return matchup_pairs(filtered_matches(filters, version))
+
+def matchup_matrix(pairs, options):
+    rows, columns = matchup_teams(pairs, options['TeamName'], MAX_TEAMS)
+    data = pairs[pairs['Team'].isin(rows) & pairs['Opponent'].isin(columns)]
+
+    if data.empty:
+        st.info('No matches between the selected teams.')
+        return
+
+    st.altair_chart(heatmap_chart_matchups(data, rows, columns), use_container_width=True)
+
+def matchup_details(pairs, filters, version):
+    st.subheader('Matches')
+
+    col1, col2 = st.columns(2)
+    team = col1.selectbox('Team', sorted(pairs['Team'].unique()), index=None, placeholder='Team', label_visibility='hidden')
+    opponents = pairs[pairs['Team'] == team].sort_values('Games', ascending=False)
+    opponent = col2.selectbox('Opponent', opponents['Opponent'], index=None, placeholder='Opponent', label_visibility='hidden')
+
+    if not team or not opponent:
+        return
+
+    record = opponents[opponents['Opponent'] == opponent].iloc[0]
+    metrics = {
+        'Games': int(record['Games']),
+        'Wins': int(record['Wins']),
+        'Losses': int(record['Losses']),
+        'Win rate': f"{record['WinRate']:.0%}"
+    }
+    metrics_block(metrics)
+
+    matches = head_to_head_matches(filtered_matches(filters, version), team, opponent)
+    st.dataframe(matches, hide_index=True, use_container_width=True)
+
+header()
+_, options = filters()
+match_filters = filters_key({key: options[key] for key in MATCH_FILTERS})
+version = data_version()
+pairs = matchups_data(match_filters, version)
+matchup_matrix(pairs, options)
+st.divider()
+matchup_details(pairs, match_filters, version)
@@ -1,58 +1,55 @@
 import streamlit as st
 import pandas as pd
 
-from utility.blocks import filters_block
-from utility.database import read_comp_data
-from utility.methods import nunique, filter_dataframe, unique, safe_division
-from utility.datasources import mech_data
+from utility.index import comp_data_index
+from utility.blocks import filter_options
+from utility.database import weekly_table, data_version
+from utility.methods import filters_key, apply_filters
+from utility.caching import page_cache
+from utility.stats import wlr, kdr
+from utility.datasources import mech_data, mech_list_key
+from utility.cube import query
+from utility.trends import rolling_trends, TREND_WINDOW
 
 def header():
     st.header('Mechs')
 
 def filters():
-    df = read_comp_data()
     options = {'Tournament': None, 'Division': None, 'Class': 'Weight class', 'Chassis': None, 'Mech': None}
-    return filters_block(df, options)
-
-def calculate_wlr(values):
-    return safe_division(values.eq('WIN').sum(), values.eq('LOSS').sum())
-
-def calculate_kdr(dividend, divisor):
-    divisor.replace(0, 1, inplace=True)
-    result = dividend.div(divisor)
-    
-    return result
-
-def mechs_data(df):
-    aggregation_method = 'mean'
-
-    df['Deaths'] = [1 if health == 0 else 0 for health in df['HealthPercentage']]
-    
-    mech_stats = df.groupby(['Mech', 'Chassis'], as_index=False).agg(
-        Tonnage=('Tonnage', 'mean'),
-        MS=('MatchScore', aggregation_method),
-        Kills=('Kills', aggregation_method),
-        KMDDs=('KillsMostDamage', aggregation_method),
-        Assists=('Assists', aggregation_method),
-        CD=('ComponentsDestroyed', aggregation_method),
-        Deaths=('Deaths', aggregation_method),
-        DMG=('Damage', aggregation_method),
-        TD=('TeamDamage', aggregation_method),
-        WLR=('MatchResult', lambda values: calculate_wlr(values)),
-        TotalKills=('Kills', 'sum'),
-        TotalDeaths=('Deaths', 'sum'),
-        Uses=('MatchID','count'),
-        Score=('Score','sum')
+    return filter_options(options, comp_data_index())
+
+def mechs_data(filters):
+    """Average mech performance, computed from the summed measures of the mechs cuboid."""
+    mech_stats = query('mechs', ['Mech', 'Chassis', 'Tonnage'], filters)
+    uses = mech_stats['Uses']
+
+    averages = {
+        'MS': 'MatchScore',
+        'Kills': 'Kills',
+        'KMDDs': 'KillsMostDamage',
+        'Assists': 'Assists',
+        'CD': 'ComponentsDestroyed',
+        'Deaths': 'Deaths',
+        'DMG': 'Damage',
+        'TD': 'TeamDamage'
+    }
+    result = mech_stats[['Mech', 'Chassis', 'Tonnage']].assign(
+        **{name: mech_stats[column] / uses for name, column in averages.items()},
+        TotalKills=mech_stats['Kills'],
+        TotalDeaths=mech_stats['Deaths'],
+        Uses=uses,
+        Score=mech_stats['Score'],
+        WLR=wlr(mech_stats['Wins'], uses - mech_stats['Wins']),
+        KDR=kdr(mech_stats['Kills'], mech_stats['Deaths'])
     )
-    mech_stats['KDR'] = calculate_kdr(mech_stats['TotalKills'], mech_stats['TotalDeaths'].copy())
 
-    return mech_stats
+    return result
 
 def get_full_list(options):
     def match_filters(value, options):
-        return (not options['Class'] or value['Class'] in options['Class']) \
-            and (not options['Chassis'] or value['Chassis'] in options['Chassis']) \
-            and (not options['Mech'] or value['Mech'] in options['Mech'])
+        return (not options.get('Class') or value['Class'] in options['Class']) \
+            and (not options.get('Chassis') or value['Chassis'] in options['Chassis']) \
+            and (not options.get('Mech') or value['Mech'] in options['Mech'])
     
     data = mech_data()
     all_mechs = [[value['Mech'], value['Chassis']] for _, value in data.items() if match_filters(value, options)]
@@ -74,17 +71,39 @@ def get_page_number(last_page):
 def set_page_number(new_value):
     st.session_state['mech_page_number'] = new_value
 
-def mech_statistics(df, options):
-    all_mechs = get_full_list(options)
-    mech_stats = mechs_data(df)
+def mech_trends(filters, version):
+    """Weekly usage share and win rate of every mech within the selected tournaments and divisions."""
+    scope = tuple((key, value) for key, value in filters if key in ('Tournament', 'Division'))
+    weekly = apply_filters(weekly_table(version, 'WeeklyMechs'), scope)
+    return rolling_trends(weekly, 'Mech', 'Uses', 'Wins')
+
+@page_cache('mech')
+def sorted_mechs_data(filters, version, mech_list):
+    """
+    Mech statistics merged with the full mech list and ranked, pages are slices of this result.
+
+    `mech_list` is only a part of the cache key, see `mech_list_key()`.
+    """
+    all_mechs = get_full_list(dict(filters))
+    mech_stats = mechs_data(filters)
 
     merged_data = all_mechs.merge(mech_stats, on=['Mech', 'Chassis'], how='left')
     merged_data.fillna(0, inplace=True)
 
     merged_data['Uses'] = merged_data['Uses'].astype(int)
     merged_data['Score'] = merged_data['Score'].astype(int)
-    merged_data['Order'] = [1 if uses > 0 else 0 for uses in merged_data['Uses']]
+    merged_data['Order'] = (merged_data['Uses'] > 0).astype(int)
+
+    merged_data = merged_data.sort_values(['Order', 'Score', 'Uses', 'MS'], ascending=[False, False, False, False], ignore_index=True)
+    merged_data['Rank'] = merged_data.index + 1
 
+    merged_data = merged_data.join(mech_trends(filters, version), on='Mech')
+    merged_data[['UsageTrend', 'WinRateTrend']] = merged_data[['UsageTrend', 'WinRateTrend']].astype(object).where(merged_data[['UsageTrend', 'WinRateTrend']].notna(), None)
+
+    return merged_data
+
+@st.fragment
+def mech_statistics(merged_data):
     page_size = 100
     last_page = merged_data.shape[0] // page_size
     page_number = get_page_number(last_page)
@@ -93,7 +112,7 @@ def mech_statistics(df, options):
 
     with col1:
         with st.popover("Column descriptions:", use_container_width=True):
-            st.markdown('''
+            st.markdown(f'''
                 - `Tonnage`: Mech tonnage
                 - `MS`: Match Score (avg.)
                 - `Kills`: Kills (avg.)
@@ -107,6 +126,8 @@ def mech_statistics(df, options):
                 - `WLR`: Wins to Losses ratio
                 - `Uses`: Total use count
                 - `Score`: Calculated by subtracting lost games from the games won
+                - `Usage trend`: Share of all mech uses over the last year, {TREND_WINDOW}-week rolling window
+                - `Win rate trend`: Win rate over the last year, {TREND_WINDOW}-week rolling window
             ''')
 
     with col2:
@@ -131,18 +152,19 @@ def mech_statistics(df, options):
     # Rows to display
     start_idx = page_number * page_size 
     end_idx = (1 + page_number) * page_size
+    merged_data = merged_data.iloc[start_idx:end_idx]
 
-    # Sorting dataset
-    merged_data = merged_data.sort_values(['Order', 'Score', 'Uses', 'MS'], ascending=[False, False, False, False], ignore_index=True).iloc[start_idx:end_idx]
-
-    merged_data['Rank'] = merged_data.index + 1
     df_height = 35 * (merged_data.shape[0] + 1) + 3
 
     merged_data = merged_data.style.format(subset=['Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'DMG', 'TD', 'WLR', 'KDR'], formatter="{:.2f}")
-    column_order = ['Rank', 'Mech', 'Chassis', 'Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'KDR', 'DMG', 'TD', 'WLR', 'Uses', 'Score']
+    column_order = ['Rank', 'Mech', 'Chassis', 'Tonnage', 'MS', 'Kills', 'KMDDs', 'Assists', 'CD', 'Deaths', 'KDR', 'DMG', 'TD', 'WLR', 'Uses', 'Score', 'UsageTrend', 'WinRateTrend']
+    column_config = {
+        'UsageTrend': st.column_config.LineChartColumn('Usage trend', y_min=0),
+        'WinRateTrend': st.column_config.LineChartColumn('Win rate trend', y_min=0, y_max=1)
+    }
 
-    st.dataframe(merged_data, hide_index=True, column_order=column_order, use_container_width=True, height=df_height)
+    st.dataframe(merged_data, hide_index=True, column_order=column_order, column_config=column_config, use_container_width=True, height=df_height)
 
 header()
-df, options = filters()
-mech_statistics(df, options)
+options = filters()
+mech_statistics(sorted_mechs_data(filters_key(options), data_version(), mech_list_key()))
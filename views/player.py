@@ -1,19 +1,29 @@
 import streamlit as st
 import pandas as pd
 
-from utility.database import read_comp_data
-from utility.methods import nunique, filter_dataframe, safe_division
+from utility.database import read_comp_data, comp_data, data_version
+from utility.methods import nunique, filter_dataframe, safe_division, error, filters_key, apply_filters
 from utility.charts import bar_chart
-from utility.blocks import filters_block, metrics_block, charts_block
-from utility.requests import jarls_pilot_overview_link, jarls_pilot_stats
+from utility.index import comp_data_index
+from utility.blocks import filters_block, metrics_block, charts_block, duos_block
+from utility.requests import jarls_pilot_overview_link, jarls_client
+from utility import stats
+from utility.caching import page_cache
+from utility.synergy import duo_pairs, top_duos, MIN_DUO_GAMES
+from utility.form import recent_form, FORM_WINDOWS, FORM_METRICS
+
+COLUMNS = [
+    'Tournament', 'Division', 'TeamName', 'Username', 'MatchID', 'Team', 'Win',
+    'Death', 'Score', 'Chassis', 'Class', 'Kills', 'KillsMostDamage', 'MatchScore', 'Damage'
+]
 
 def header():
     st.header('Players')
 
 def filters():
-    df = read_comp_data()
+    df = read_comp_data(COLUMNS)
     options = {'Tournament': None, 'Division': None, 'TeamName': 'Team', 'Username': 'Player'}
-    return filters_block(df, options)
+    return filters_block(df, options, index=comp_data_index())
 
 def general_statistics(df, options):
     players_count = nunique(df, 'Username')
@@ -35,11 +45,29 @@ def general_statistics(df, options):
     col3.metric('Highest score', score_player, score_value, delta_color='off')
     col4.metric('Most kills', kills_player, kills_value, delta_color='off')
 
+def player_title(player, rank=''):
+    return f"### {player} / Rank: {rank} ([jarls]({jarls_pilot_overview_link(player)}))"
+
+def player_form(form, player):
+    """Recent form table of a player, one row per window of last games."""
+    if player not in form.index:
+        return
+
+    recent = pd.DataFrame(
+        {metric: [form.at[player, f'{metric}{window}'] for window in FORM_WINDOWS] for metric in FORM_METRICS},
+        index=[f'Last {window} games' for window in FORM_WINDOWS]
+    )
+    st.dataframe(recent.style.format(formatter="{:.2f}"), use_container_width=True)
+
 def player_overview(df, options):
+    # Ranks are looked up in the background and filled in once the overview is rendered
+    lookups = {player: jarls_client().submit(player) for player in options['Username']}
+    titles = {}
+    form = recent_form(df)
+
     for player in options['Username']:
-        pilot_stats = jarls_pilot_stats(player)
-        rank = pilot_stats['Rank'] if pilot_stats else ""
-        st.markdown(f"### {player} / Rank: {rank} ([jarls]({jarls_pilot_overview_link(player)}))")
+        titles[player] = st.empty()
+        titles[player].markdown(player_title(player))
         
         player_data = filter_dataframe(df, 'Username', player)
 
@@ -52,7 +80,7 @@ def player_overview(df, options):
 
         kills_total = player_data['Kills'].sum()
         kills = player_data['Kills'].mean()
-        deaths = player_data[player_data['HealthPercentage'] == 0].shape[0]
+        deaths = stats.deaths(player_data).sum()
         KDR = safe_division(kills_total, deaths)
         survival_rate = safe_division(games_played - deaths, games_played)
         
@@ -83,8 +111,18 @@ def player_overview(df, options):
                 height=200
             ))
 
+        player_form(form, player)
+
         st.divider()
 
+    for player, lookup in lookups.items():
+        pilot_stats, message = lookup.result()
+        if message:
+            error(message)
+
+        rank = pilot_stats['Rank'] if pilot_stats else ""
+        titles[player].markdown(player_title(player, rank))
+
 def player_teams(df, options):
     teams_data = df.groupby(['Username', 'Tournament', 'Division', 'TeamName'], as_index=False).agg(
         Games=('MatchID','nunique'),
@@ -100,8 +138,7 @@ def player_mechs(df, options):
         player_data = filter_dataframe(df, 'Username', player)
         top_chassis = player_data['Chassis'].value_counts().sort_values(ascending=False).head(10).reset_index()
 
-        chassis_stats = player_data.groupby('Chassis')['MatchResult'].apply(lambda x: safe_division(x.value_counts().get('WIN', 0), x.value_counts().get('LOSS', 0)))
-        chassis_stats = chassis_stats.reset_index().rename(columns={'MatchResult': 'WLR'}).sort_values(by=['WLR'], ascending=False).head(10)
+        chassis_stats = stats.group_stats(player_data, 'Chassis').sort_values(by=['WLR'], ascending=False).head(10)
 
         charts = [
             bar_chart(top_chassis, 'Most used chassis', 'Chassis', 'count'),
@@ -111,8 +148,23 @@ def player_mechs(df, options):
 
         st.divider()
 
+@page_cache('player')
+def duos_data(filters, version, players):
+    """Pairs of the selected players in the lineups left by the filters, partners are not limited by the player filter."""
+    df = apply_filters(comp_data(version, ('Tournament', 'Division', 'TeamName', 'MatchID', 'Team', 'Username', 'Win')), filters)
+    return duo_pairs(df, pilots=list(players))
+
+def player_duos(options):
+    min_games = st.slider('Minimum games together', 1, 50, MIN_DUO_GAMES, key='player_duo_games')
+    filters = filters_key({key: value for key, value in options.items() if key != 'Username'})
+    pairs = duos_data(filters, data_version(), tuple(options['Username']))
+
+    for player in options['Username']:
+        st.subheader(player)
+        duos_block(top_duos(pairs, min_games, pilot=player), 'Player', 'Partner')
+
 def player_statistics(df, options):
-    overview, teams, mechs = st.tabs(['Overview', 'Teams', 'Mechs'])
+    overview, teams, mechs, duos = st.tabs(['Overview', 'Teams', 'Mechs', 'Duos'])
 
     with overview:
         player_overview(df, options)
@@ -123,6 +175,9 @@ def player_statistics(df, options):
     with mechs:
         player_mechs(df, options)
 
+    with duos:
+        player_duos(options)
+
 header()
 df, options = filters()
 if options['Username']:
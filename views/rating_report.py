@@ -0,0 +1,80 @@
+import streamlit as st
+import altair as alt
+
+from utility.database import read_match_predictions, rating_version
+from utility.calibration import calibration_report
+from utility.blocks import metrics_block
+
+def back_button():
+    if st.button('< Back'):
+        st.switch_page('views/admin.py')
+
+def header():
+    st.header('Rating report')
+
+@st.cache_data
+def report(version):
+    predictions = read_match_predictions()
+    if predictions.empty:
+        return None
+
+    return calibration_report(predictions)
+
+def overall_quality(overall):
+    metrics = {
+        'Matches': int(overall['Matches']),
+        'Accuracy': f"{overall['Accuracy']:.1%}",
+        'Log-loss': f"{overall['LogLoss']:.3f}",
+        'Brier score': f"{overall['Brier']:.3f}"
+    }
+    metrics_block(metrics)
+
+    st.divider()
+
+def reliability_diagram(reliability):
+    diagonal = alt.Chart(reliability).mark_line(color='gray', strokeDash=[4, 4]).encode(
+        x=alt.X('Predicted:Q', scale=alt.Scale(domain=[0, 1]), title='Predicted win probability'),
+        y=alt.Y('Predicted:Q', scale=alt.Scale(domain=[0, 1]), title='Observed win rate')
+    )
+
+    observed = alt.Chart(reliability).mark_line(point=True, color='firebrick').encode(
+        x='Predicted:Q',
+        y='Observed:Q',
+        tooltip=[
+            alt.Tooltip('Predicted:Q', title='Predicted', format='.1%'),
+            alt.Tooltip('Observed:Q', title='Observed', format='.1%'),
+            alt.Tooltip('Matches:Q', title='Matches')
+        ]
+    )
+
+    st.altair_chart((diagonal + observed).properties(title='Reliability diagram', height=400), use_container_width=True)
+
+def quality_over_time(periods):
+    chart = alt.Chart(periods, title='Accuracy and log-loss by month').transform_fold(
+        ['Accuracy', 'LogLoss'],
+        as_=['Metric', 'Value']
+    ).mark_line(point=True).encode(
+        x=alt.X('Period:T', title=None),
+        y=alt.Y('Value:Q', title=None),
+        color=alt.Color('Metric:N', legend=alt.Legend(title='Metric')),
+        tooltip=[alt.Tooltip('Period:T', format='%Y-%m'), 'Metric:N', alt.Tooltip('Value:Q', format='.3f'), 'Matches:Q']
+    )
+
+    st.altair_chart(chart, use_container_width=True)
+
+def quality_by_division(divisions):
+    df_height = 35 * (divisions.shape[0] + 1) + 3
+    divisions = divisions.style.format(subset=['Accuracy'], formatter="{:.1%}").format(subset=['LogLoss', 'Brier'], formatter="{:.3f}")
+    st.dataframe(divisions, hide_index=True, use_container_width=True, height=df_height)
+
+back_button()
+header()
+
+data = report(rating_version())
+if data is None:
+    st.write('Ratings have not been calculated yet ...')
+else:
+    overall_quality(data['overall'])
+    reliability_diagram(data['reliability'])
+    quality_over_time(data['periods'])
+    quality_by_division(data['divisions'])
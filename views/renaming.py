@@ -1,9 +1,12 @@
 import streamlit as st
 
 from utility.database import read_comp_data, update_values
+from utility.cube import build_cube
 from utility.blocks import filters_block
 from utility.methods import error
 
+COLUMNS = ['Username', 'TeamName']
+
 def back_button():
     if st.button('< Back'):
         st.switch_page('views/admin.py')
@@ -21,6 +24,8 @@ def team_renaming(df):
             result = update_values(key, old_value, new_value)
             if result:
                 error(result)
+            else:
+                build_cube()
     
 def pilot_renaming(df):
     st.header('Pilot renaming')
@@ -35,10 +40,12 @@ def pilot_renaming(df):
             result = update_values(key, old_value, new_value)
             if result:
                 error(result)
+            else:
+                build_cube()
 
 back_button()
 
-df = read_comp_data()
+df = read_comp_data(COLUMNS)
 
 team, pilot = st.columns(2)
 with team:
@@ -1,8 +1,11 @@
 import streamlit as st
 
 from utility.globals import get_labels_angle, set_labels_angle, get_leaderboard_size, set_leaderboard_size
+from utility.globals import get_chart_points_budget, set_chart_points_budget
 from utility.globals import get_leaderboard_aggregation_method, set_leaderboard_aggregation_method, get_leaderboard_default_sorting, set_leaderboard_default_sorting
 from utility.enums import AggregationMethod, SortingOption
+from utility.caching import RESULT_CACHE
+from utility.blocks import metrics_block
 
 def main_header():
     st.header('Settings')
@@ -26,6 +29,9 @@ def charts():
     options = {'Horizontal': 0, '45 degree': -45, 'Vertical': -90}
     display_options('Labels angle', options, get_labels_angle, set_labels_angle)
 
+    options = {'500': 500, '1000': 1000, '2000': 2000, 'All': 0}
+    display_options('Maximum points on rating history charts', options, get_chart_points_budget, set_chart_points_budget)
+
 def leaderboard():
     st.subheader('Leaderboard')
 
@@ -38,6 +44,20 @@ def leaderboard():
     options = {item.value: item for item in SortingOption}
     display_options('Default column for leaderboard sorting', options, get_leaderboard_default_sorting, set_leaderboard_default_sorting)
 
+def caching():
+    st.subheader('Caching')
+
+    stats = RESULT_CACHE.stats()
+    metrics = {
+        'Hits': stats['Hits'],
+        'Misses': stats['Misses'],
+        'Evictions': stats['Evictions'],
+        'Entries': stats['Entries'],
+        'Memory': f"{stats['Size'] / 2**20:.1f} / {stats['Budget'] / 2**20:.0f} MB"
+    }
+    metrics_block(metrics)
+
 main_header()
 charts()
 leaderboard()
+caching()
@@ -1,32 +1,45 @@
 import streamlit as st
 import numpy as np
 
-from utility.database import read_comp_data
-from utility.methods import nunique, unique, filter_dataframe, error, safe_division
+from utility.database import read_comp_data, read_match_teams
+from utility.methods import nunique, unique, filter_dataframe, error, safe_division, filters_key, apply_filters
 from utility.charts import bar_chart, negative_horizontal_stacked_bar_chart_map_stats
-from utility.blocks import filters_block, metrics_block
+from utility.index import comp_data_index
+from utility.blocks import filters_block, metrics_block, duos_block
+from utility.stats import group_stats
+from utility.synergy import duo_pairs, top_duos, MIN_DUO_GAMES
+
+COLUMNS = [
+    'Tournament', 'Division', 'TeamName', 'Username', 'Map', 'MatchID', 'Team', 'Win',
+    'Death', 'Score', 'Mech', 'Chassis', 'Tonnage', 'Class', 'Kills', 'KillsMostDamage',
+    'Assists', 'ComponentsDestroyed', 'MatchScore', 'Damage', 'TeamDamage'
+]
 
 def header():
     st.header('Teams')
 
 def filters():
-    df = read_comp_data()
+    df = read_comp_data(COLUMNS)
     options = {'Tournament': None, 'Division': None, 'TeamName': 'Team', 'Map': None}
-    return filters_block(df, options)
+    return filters_block(df, options, index=comp_data_index())
+
+def match_teams(options):
+    """Team-per-match facts for the selected filters."""
+    return apply_filters(read_match_teams(), filters_key(options))
 
-def team_mech_statistics(df):
-    games_played = nunique(df, 'MatchID')
-    wins = filter_dataframe(df, 'MatchResult', 'WIN').drop_duplicates(subset=['MatchID']).shape[0]
-    losses = filter_dataframe(df, 'MatchResult', 'LOSS').drop_duplicates(subset=['MatchID']).shape[0]
+def team_mech_statistics(df, facts):
+    games_played = nunique(facts, 'MatchID')
+    wins = int(facts['Win'].sum())
+    losses = games_played - wins
     win_loss_ratio = safe_division(wins, losses)
 
-    t1_games = filter_dataframe(df, 'Team', '1')
-    t1_wins = safe_division(filter_dataframe(t1_games, 'MatchResult', 'WIN').shape[0], t1_games.shape[0])
-    t2_games = filter_dataframe(df, 'Team', '2')
-    t2_wins = safe_division(filter_dataframe(t2_games, 'MatchResult', 'WIN').shape[0], t2_games.shape[0])
+    t1_games = filter_dataframe(facts, 'Team', '1')
+    t1_wins = safe_division(t1_games['Win'].sum(), t1_games.shape[0])
+    t2_games = filter_dataframe(facts, 'Team', '2')
+    t2_wins = safe_division(t2_games['Win'].sum(), t2_games.shape[0])
 
-    avg_kills = safe_division(df['Kills'].sum(), games_played)
-    avg_damage = safe_division(df['Damage'].sum(), games_played)
+    avg_kills = safe_division(facts['Kills'].sum(), games_played)
+    avg_damage = safe_division(facts['Damage'].sum(), games_played)
 
     weight_class_order = ['LIGHT', 'MEDIUM', 'HEAVY', 'ASSAULT']
     class_distribution = df.groupby('Class')['Class'].value_counts().reindex(weight_class_order).reset_index()
@@ -54,22 +67,24 @@ def team_mech_statistics(df):
     col3.altair_chart(
         bar_chart(class_distribution, 'Weight class distribution', 'Class', 'count'), use_container_width=True)
 
-def team_statistics(df, options):
-    mechs, maps, rosters, tournaments = st.tabs(['Mechs', 'Maps', 'Rosters', 'Tournaments'])
+def team_statistics(df, facts, options):
+    mechs, maps, rosters, duos, tournaments = st.tabs(['Mechs', 'Maps', 'Rosters', 'Duos', 'Tournaments'])
     with mechs:
         teams = options['TeamName']
         for team in teams:
             team_data = filter_dataframe(df, 'TeamName', team)
+            team_facts = filter_dataframe(facts, 'TeamName', team)
 
             st.subheader(team)
-            team_mech_statistics(team_data)
+            team_mech_statistics(team_data, team_facts)
 
     with maps:
         max_columns = 3
         
-        map_stats = df.groupby(['Map', 'TeamName', 'MatchResult'])['MatchID'].nunique().reset_index(name='count').rename(columns={'MatchResult': 'Result', 'TeamName': 'Team'})
-        map_stats['Positive'] = map_stats.apply(lambda row: row['count'] if row['Result'] == 'WIN' else 0, axis=1)
-        map_stats['Negative'] = map_stats.apply(lambda row: -row['count'] if row['Result'] == 'LOSS' else 0, axis=1)
+        map_stats = facts.groupby(['Map', 'TeamName', 'Win']).size().reset_index(name='count').rename(columns={'TeamName': 'Team'})
+        map_stats['Result'] = np.where(map_stats['Win'] == 1, 'WIN', 'LOSS')
+        map_stats['Positive'] = np.where(map_stats['Result'] == 'WIN', map_stats['count'], 0)
+        map_stats['Negative'] = np.where(map_stats['Result'] == 'LOSS', -map_stats['count'], 0)
         map_stats = map_stats.sort_values(by=['Team', 'Map'], ascending=True)
 
         teams = options['TeamName']
@@ -88,8 +103,7 @@ def team_statistics(df, options):
                 negative_horizontal_stacked_bar_chart_map_stats(team_data, team_name), use_container_width=True)
 
     with rosters:
-        df['Deaths'] = np.where(df['HealthPercentage'] == 0, 1, 0)
-        pilot_stats = df.groupby(['Username', 'TeamName'], as_index=False).agg(
+        pilot_stats = group_stats(df, ['Username', 'TeamName'],
             Score=('MatchScore','mean'),
             Tonnage=('Tonnage','mean'),
             Kills=('Kills','mean'),
@@ -106,21 +120,28 @@ def team_statistics(df, options):
         pilot_stats = pilot_stats.style.format(subset=['Score', 'Tonnage', 'Kills', 'KMDDs', 'Assists', 'CDs', 'Deaths', 'DMG', 'TD'], formatter="{:.2f}")
         st.dataframe(pilot_stats, hide_index=True, use_container_width=True, height=df_height)
     
+    with duos:
+        min_games = st.slider('Minimum games together', 1, 50, MIN_DUO_GAMES, key='team_duo_games')
+        pairs = duo_pairs(df, 'TeamName')
+
+        for team in options['TeamName']:
+            st.subheader(team)
+            duos_block(top_duos(filter_dataframe(pairs, 'TeamName', team), min_games))
+
     with tournaments:
         divisions = df[['Tournament', 'TeamName', 'Division']].drop_duplicates()
         df_height = 35 * (divisions.shape[0] + 1) + 3
         st.dataframe(divisions, hide_index=True, use_container_width=True, height=df_height)
 
-def general_statistics(df, options):
-    tournaments_count = nunique(df, 'Tournament')
-    teams_count = nunique(df, 'TeamName')
+def general_statistics(facts, options):
+    tournaments_count = nunique(facts, 'Tournament')
+    teams_count = nunique(facts, 'TeamName')
 
-    team_data = df[['MatchID', 'TeamName', 'Score']].drop_duplicates()
-    score_sum = team_data.groupby('TeamName')['Score'].sum()
+    groupped_data = facts.groupby('TeamName')
+    score_sum = groupped_data['Score'].sum()
     score_team = score_sum.idxmax()
     score_value = int(score_sum.max())
 
-    groupped_data = df.groupby('TeamName')
     kills_sum = groupped_data['Kills'].sum()
     kills_team = kills_sum.idxmax()
     kills_value = int(kills_sum.max())
@@ -133,7 +154,8 @@ def general_statistics(df, options):
 
 header()
 df, options = filters()
+facts = match_teams(options)
 if options['TeamName']:
-    team_statistics(df, options)
+    team_statistics(df, facts, options)
 else:
-    general_statistics(df, options)
+    general_statistics(facts, options)
@@ -2,23 +2,28 @@ import streamlit as st
 import pandas as pd
 
 from utility.database import read_comp_data
-from utility.methods import nunique, filter_dataframe, safe_division
+from utility.methods import filters_key
 from utility.charts import bar_chart
+from utility.index import comp_data_index
 from utility.blocks import filters_block, metrics_block, charts_block
+from utility.cube import query, distinct, slice_cuboid
+
+COLUMNS = ['Tournament', 'Division']
 
 def header():
     st.header('Tournaments')
 
 def filters():
-    df = read_comp_data()
+    df = read_comp_data(COLUMNS)
     options = {'Tournament': None, 'Division': None}
-    return filters_block(df, options)
+    return filters_block(df, options, index=comp_data_index())
 
-def general_statistics(df, options):
-    tournaments_count = nunique(df, 'Tournament')
-    teams_count = nunique(df, 'TeamName')
-    players_count = nunique(df, 'Username')
-    games_played = nunique(df, 'MatchID')
+def general_statistics(options):
+    filters = filters_key(options)
+    tournaments_count = distinct('players', 'Tournament', filters)
+    teams_count = distinct('players', 'TeamName', filters)
+    players_count = distinct('players', 'Username', filters)
+    games_played = int(query('matches', filters=filters, measures=['Games'])['Games'])
 
     metrics = {
         'Tournaments': tournaments_count,
@@ -28,82 +33,87 @@ def general_statistics(df, options):
     }
     metrics_block(metrics)
 
-def tournament_statistics(df, options):
+def tournament_statistics(options):
+    summary = query('mechs', ['Tournament', 'Division', 'Class', 'Chassis', 'Mech', 'Tonnage'], filters_key(options), ['Uses'])
     overview, details = st.tabs(['Overview', 'Details'])
 
     with overview:
-        tournament_overview(df, options)
+        tournament_overview(summary, options)
 
     with details:
-        tournament_details(df, options)
+        tournament_details(summary, options)
+
+def top_usage(summary, keys, column, count):
+    """Most used values of `column` within every group of `keys`."""
+    usage = summary.groupby(keys + [column])['Uses'].sum()
+    top = usage.groupby(level=keys, group_keys=False).nlargest(count)
+
+    return top.reset_index(name='count')
+
+def group_rows(df, column, **keys):
+    for key, value in keys.items():
+        df = df[df[key] == value]
+
+    return df[[column, 'count']]
+
+def tournament_overview(summary, options):
+    filters = filters_key(options)
+    tournaments_data = slice_cuboid('players', filters).groupby('Tournament')[['TeamName', 'Username']].nunique()
+    tournaments_data['Games'] = query('matches', ['Tournament'], filters, ['Games']).set_index('Tournament')['Games']
+    tournaments_data = tournaments_data.reindex(options['Tournament'], fill_value=0)
+
+    tonnage_order = [i for i in range(20, 105, 5)]
+    weights = summary.groupby(['Tournament', 'Tonnage'])['Uses'].sum()
+    top_mechs = top_usage(summary, ['Tournament'], 'Mech', 10)
+    top_chassis = top_usage(summary, ['Tournament'], 'Chassis', 10)
 
-def tournament_overview(df, options):
     for tournament in options['Tournament']:
         st.subheader(tournament)
 
-        tournament_data = filter_dataframe(df, 'Tournament', tournament)
-
         metrics = {
-            'Teams': nunique(tournament_data, 'TeamName'),
-            'Players': nunique(tournament_data, 'Username'),
-            'Games': nunique(tournament_data, 'MatchID'),
+            'Teams': tournaments_data.at[tournament, 'TeamName'],
+            'Players': tournaments_data.at[tournament, 'Username'],
+            'Games': tournaments_data.at[tournament, 'Games'],
         }
         metrics_block(metrics, 3)
 
-        tonnage_order = [i for i in range(20, 105, 5)]
-        weight_distribution = tournament_data['Tonnage'].value_counts().reindex(tonnage_order).reset_index()
-
-        top_mechs = tournament_data['Mech'].value_counts().sort_values(ascending=False).head(10).reset_index()
-        top_chassis = tournament_data['Chassis'].value_counts().sort_values(ascending=False).head(10).reset_index()
+        weight_distribution = pd.DataFrame({
+            'Tonnage': tonnage_order,
+            'count': weights.reindex(pd.MultiIndex.from_product([[tournament], tonnage_order])).to_numpy()
+        })
 
         charts = [
             bar_chart(weight_distribution, 'Weight distribution', 'Tonnage', 'count'),
-            bar_chart(top_mechs, 'Most used mechs', 'Mech', 'count'),
-            bar_chart(top_chassis, 'Most used chassis', 'Chassis', 'count', style='alternate')
+            bar_chart(group_rows(top_mechs, 'Mech', Tournament=tournament), 'Most used mechs', 'Mech', 'count'),
+            bar_chart(group_rows(top_chassis, 'Chassis', Tournament=tournament), 'Most used chassis', 'Chassis', 'count', style='alternate')
         ]
         charts_block(charts)
 
         st.divider()
 
-def tournament_details(df, options):
+def tournament_details(summary, options):
+    weight_classes = ['LIGHT', 'MEDIUM', 'HEAVY', 'ASSAULT']
+    top_mechs = top_usage(summary, ['Tournament', 'Class'], 'Mech', 5)
+    top_chassis = top_usage(summary, ['Tournament', 'Class'], 'Chassis', 5)
+
     for tournament in options['Tournament']:
         st.subheader(tournament)
 
-        tournament_data = filter_dataframe(df, 'Tournament', tournament)
-
-        light_mechs_data = filter_dataframe(tournament_data, 'Class', 'LIGHT')
-        top_light_mechs = light_mechs_data['Mech'].value_counts().sort_values(ascending=False).head(5).reset_index()
-        top_light_chassis = light_mechs_data['Chassis'].value_counts().sort_values(ascending=False).head(5).reset_index()
-
-        medium_mechs_data = filter_dataframe(tournament_data, 'Class', 'MEDIUM')
-        top_medium_mechs = medium_mechs_data['Mech'].value_counts().sort_values(ascending=False).head(5).reset_index()
-        top_medium_chassis = medium_mechs_data['Chassis'].value_counts().sort_values(ascending=False).head(5).reset_index()
-
-        heavy_mechs_data = filter_dataframe(tournament_data, 'Class', 'HEAVY')
-        top_heavy_mechs = heavy_mechs_data['Mech'].value_counts().sort_values(ascending=False).head(5).reset_index()
-        top_heavy_chassis = heavy_mechs_data['Chassis'].value_counts().sort_values(ascending=False).head(5).reset_index()
-
-        assault_mechs_data = filter_dataframe(tournament_data, 'Class', 'ASSAULT')
-        top_assault_mechs = assault_mechs_data['Mech'].value_counts().sort_values(ascending=False).head(5).reset_index()
-        top_assault_chassis = assault_mechs_data['Chassis'].value_counts().sort_values(ascending=False).head(5).reset_index()
-
-        charts = [
-            bar_chart(top_light_mechs, 'Most used light mechs', 'Mech', 'count'),
-            bar_chart(top_medium_mechs, 'Most used medium mechs', 'Mech', 'count'),
-            bar_chart(top_heavy_mechs, 'Most used heavy mechs', 'Mech', 'count'),
-            bar_chart(top_assault_mechs, 'Most used assault mechs', 'Mech', 'count'),
-            bar_chart(top_light_chassis, 'Most used light chassis', 'Chassis', 'count', style='alternate'),
-            bar_chart(top_medium_chassis, 'Most used medium chassis', 'Chassis', 'count', style='alternate'),
-            bar_chart(top_heavy_chassis, 'Most used heavy chassis', 'Chassis', 'count', style='alternate'),
-            bar_chart(top_assault_chassis, 'Most used assault chassis', 'Chassis', 'count', style='alternate')
+        mech_charts = [
+            bar_chart(group_rows(top_mechs, 'Mech', Tournament=tournament, Class=weight_class), f'Most used {weight_class.lower()} mechs', 'Mech', 'count')
+            for weight_class in weight_classes
+        ]
+        chassis_charts = [
+            bar_chart(group_rows(top_chassis, 'Chassis', Tournament=tournament, Class=weight_class), f'Most used {weight_class.lower()} chassis', 'Chassis', 'count', style='alternate')
+            for weight_class in weight_classes
         ]
-        charts_block(charts, columns=4)
+        charts_block(mech_charts + chassis_charts, columns=4)
 
         st.divider()
 
 header()
-df, options = filters()
+_, options = filters()
 if options['Tournament']:
-    tournament_statistics(df, options)
+    tournament_statistics(options)
 else:
-    general_statistics(df, options)
+    general_statistics(options)
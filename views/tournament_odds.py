@@ -0,0 +1,62 @@
+import streamlit as st
+import numpy as np
+
+from utility.datasources import roster_links, team_rosters
+from utility.database import data_version
+from utility.prediction import win_predictor
+from utility.simulation import team_lineups, simulate_tournament, ROUND_ROBIN, SINGLE_ELIMINATION
+from utility.methods import error
+
+def back_button():
+    if st.button('< Back'):
+        st.switch_page('views/admin.py')
+
+def header():
+    st.header('Tournament odds')
+
+def display_inputs():
+    all_rosters = roster_links()
+    tournaments = [key for key, value in all_rosters.items() if isinstance(value, str) and value]
+
+    col1, col2, col3, col4 = st.columns(4)
+    tournament = col1.selectbox('Tournament', tournaments, index=None, placeholder='Tournament', label_visibility='hidden')
+    rosters = team_rosters(all_rosters[tournament]) if tournament else {}
+
+    divisions = sorted({str(data['Division']) for data in rosters.values()})
+    division = col2.selectbox('Division', divisions, index=None, placeholder='Division', label_visibility='hidden')
+    structure = col3.selectbox('Structure', [ROUND_ROBIN, SINGLE_ELIMINATION], label_visibility='hidden')
+    simulations = col4.selectbox('Simulations', [10000, 100000, 500000], index=1, label_visibility='hidden')
+
+    if st.button('Simulate', use_container_width=True):
+        if not tournament:
+            error('Tournament must be selected to load team rosters.')
+        else:
+            display_odds(rosters, division, structure, simulations)
+
+def display_odds(rosters, division, structure, simulations):
+    lineups = team_lineups(rosters, division)
+    if len(lineups) < 2:
+        error('At least two teams are required to run a simulation.')
+        return
+
+    predictor = win_predictor(data_version())
+    teams = list(lineups.keys())
+    strongest = [predictor.strongest_lineup(lineups[team]) for team in teams]
+
+    # Seeding follows the strength of the lineups, it matters only for elimination brackets
+    probabilities = predictor.pairwise(strongest)
+    strength = probabilities.mean(axis=1)
+    order = np.argsort(-strength, kind='stable')
+    teams = [teams[position] for position in order]
+    probabilities = probabilities[np.ix_(order, order)]
+
+    with st.spinner(f'Simulating {simulations} tournaments...'):
+        odds = simulate_tournament(teams, probabilities, structure, simulations)
+
+    odds.insert(0, 'Strength', strength[order])
+    df_height = 35 * (odds.shape[0] + 1) + 3
+    st.dataframe(odds.style.format('{:.1%}'), use_container_width=True, height=df_height)
+
+back_button()
+header()
+display_inputs()